@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from corpus import CorpusSpec, _PageWriter
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+MODES = ("read", "stream", "mmap")
+
+
+def write_large_markdown(path, megabytes, seed=1):
+    rng = random.Random(seed)
+    writer = _PageWriter(CorpusSpec(link_density=0.1), rng, ["/a", "/b", "/c"])
+    kinds = ["paragraph", "paragraph", "ordered_list", "unordered_list", "code"]
+    target = megabytes << 20
+    with open(path, "w") as f:
+        f.write("# Generated reference\n\n")
+        while f.tell() < target:
+            f.write(writer.block(rng.choice(kinds)) + "\n\n")
+
+
+def run_mode(mode, src_path, dest_path):
+    # Runs in a fresh interpreter so ru_maxrss reflects this mode alone.
+    from blocks_markdown import markdown_to_html_node
+    from mmapreader import stream_mapped_page
+    from streaming import stream_page
+    from template import CompiledTemplate
+
+    template = CompiledTemplate(TEMPLATE)
+    start = time.perf_counter()
+    with open(dest_path, "w") as out:
+        if mode == "read":
+            with open(src_path) as f:
+                markdown = f.read()
+            root = markdown_to_html_node(markdown)
+            template.stream(out, Title="Generated reference", Content=root)
+        elif mode == "stream":
+            with open(src_path) as f:
+                stream_page(f, template, out)
+        else:
+            stream_mapped_page(src_path, template, out)
+    elapsed = time.perf_counter() - start
+    return {"mode": mode, "seconds": elapsed, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read/stream/mmap input paths on a large markdown file")
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--src", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.src, args.src + f".{args.mode}.html")))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_path = os.path.join(tmp, "large.md")
+        write_large_markdown(src_path, args.megabytes)
+        results = []
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--src", src_path],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            results.append(result)
+            print(f"{mode:>6}: {result['seconds']:7.2f}s  {result['max_rss_mb']:8.1f} MB peak RSS")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"megabytes": args.megabytes, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+# Dict-backed copies of the node classes as they were before __slots__, kept
+# here so the benchmark can report a before/after comparison.
+class DictLeafNode:
+    def __init__(self, tag=None, value=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, tag=None, children=None, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def build_tree(leaf_cls, parent_cls, text_cls, count):
+    # One text node, one leaf per span and a parent per ten spans, which is
+    # roughly the shape markdown_to_html_node produces for paragraphs.
+    spans = []
+    text_nodes = []
+    paragraphs = []
+    for i in range(count):
+        text_nodes.append(text_cls("word", TextType.TEXT))
+        spans.append(leaf_cls(f"h{i % 6 + 1}" if i % 10 == 0 else None, "word"))
+        if len(spans) == 10:
+            paragraphs.append(parent_cls("p", spans))
+            spans = []
+    return paragraphs, text_nodes
+
+
+def measure(label, leaf_cls, parent_cls, text_cls, count):
+    node_count = count * 2 + count // 10
+
+    tracemalloc.start()
+    tree = build_tree(leaf_cls, parent_cls, text_cls, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+
+    start = time.perf_counter()
+    build_tree(leaf_cls, parent_cls, text_cls, count)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:>8}: {size / node_count:7.1f} bytes/node, "
+        f"{node_count / elapsed:12,.0f} nodes/sec"
+    )
+
+
+def main(count=200_000):
+    measure("before", DictLeafNode, DictParentNode, DictTextNode, count)
+    measure("after", LeafNode, ParentNode, TextNode, count)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
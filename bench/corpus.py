@@ -0,0 +1,126 @@
+import os
+import random
+
+WORDS = (
+    "ring elf shire hobbit wizard river mountain road shadow light song tale "
+    "forest tower king steward dwarf mine gate star sea ship journey fellowship"
+).split()
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 5,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 2,
+    "code": 1,
+    "quote": 1,
+}
+
+
+class CorpusSpec:
+    def __init__(
+        self,
+        pages=100,
+        blocks_per_page=20,
+        block_mix=None,
+        list_length=8,
+        link_density=0.1,
+        nesting_depth=2,
+        seed=1,
+    ):
+        self.pages = pages
+        self.blocks_per_page = blocks_per_page
+        self.block_mix = block_mix or dict(DEFAULT_BLOCK_MIX)
+        self.list_length = list_length
+        self.link_density = link_density
+        self.nesting_depth = nesting_depth
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+class _PageWriter:
+    def __init__(self, spec, rng, page_urls):
+        self.spec = spec
+        self.rng = rng
+        self.page_urls = page_urls
+
+    def words(self, count):
+        rng = self.rng
+        out = []
+        for _ in range(count):
+            roll = rng.random()
+            word = rng.choice(WORDS)
+            if roll < self.spec.link_density:
+                out.append(f"[{word}]({rng.choice(self.page_urls)})")
+            elif roll < self.spec.link_density + 0.05:
+                out.append(f"**{word}**")
+            elif roll < self.spec.link_density + 0.1:
+                out.append(f"_{word}_")
+            elif roll < self.spec.link_density + 0.12:
+                out.append(f"`{word}`")
+            else:
+                out.append(word)
+        return " ".join(out)
+
+    def block(self, kind):
+        rng = self.rng
+        length = self.spec.list_length
+        if kind == "heading":
+            return "#" * rng.randint(2, 6) + " " + self.words(4)
+        if kind == "unordered_list":
+            return "\n".join("- " + self.words(rng.randint(3, 12)) for _ in range(length))
+        if kind == "ordered_list":
+            return "\n".join(f"{i + 1}. " + self.words(rng.randint(3, 12)) for i in range(length))
+        if kind == "code":
+            return "```\n" + "\n".join(self.words(6) for _ in range(4)) + "\n```"
+        if kind == "quote":
+            return "> " + self.words(20)
+        return "\n".join(self.words(rng.randint(8, 16)) for _ in range(rng.randint(1, 4)))
+
+    def page(self, title):
+        kinds = list(self.spec.block_mix)
+        weights = [self.spec.block_mix[kind] for kind in kinds]
+        blocks = [f"# {title}"]
+        for kind in self.rng.choices(kinds, weights, k=self.spec.blocks_per_page):
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+
+def _page_paths(spec):
+    # Spread pages over a directory tree `nesting_depth` levels deep.
+    paths = []
+    for i in range(spec.pages):
+        parts = [f"section{(i >> (3 * level)) % 8}" for level in range(spec.nesting_depth)]
+        paths.append(os.path.join(*parts, f"page{i}", "index.md") if parts else os.path.join(f"page{i}", "index.md"))
+    return paths
+
+
+def generate_corpus(root, spec):
+    rng = random.Random(spec.seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    os.makedirs(static_dir, exist_ok=True)
+
+    paths = _page_paths(spec)
+    page_urls = ["/" + os.path.dirname(path).replace(os.sep, "/") for path in paths]
+    writer = _PageWriter(spec, rng, page_urls)
+    for i, rel_path in enumerate(paths):
+        path = os.path.join(content_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(writer.page(f"Page {i}"))
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(
+            '<!doctype html>\n<html>\n  <head>\n    <title>{{ Title }}</title>\n'
+            '    <link href="/index.css" rel="stylesheet" />\n  </head>\n\n'
+            "  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n"
+        )
+    with open(os.path.join(static_dir, "index.css"), "w") as f:
+        f.write("body { font-family: serif; }\n")
+
+    return paths
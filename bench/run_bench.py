@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusSpec, generate_corpus
+
+import main as site_main
+from blocks_markdown import classify_block, markdown_to_blocks, markdown_to_html_node
+from buildoptions import BuildOptions
+from inline_markdown import text_to_textnodes
+
+
+def _best_of(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def micro_benchmarks(sample_markdown, repeat=5):
+    blocks = markdown_to_blocks(sample_markdown)
+    paragraphs = [block for block in blocks if block[0].isalpha()]
+    root = markdown_to_html_node(sample_markdown)
+
+    def classify_all():
+        classify_block.cache_clear()
+        for block in blocks:
+            classify_block(block)
+
+    def tokenize_all():
+        for block in paragraphs:
+            text_to_textnodes(block)
+
+    return {
+        "markdown_to_blocks": _best_of(lambda: markdown_to_blocks(sample_markdown), repeat, 20),
+        "classify_block": _best_of(classify_all, repeat, 20),
+        "text_to_textnodes": _best_of(tokenize_all, repeat, 20),
+        "markdown_to_html_node": _best_of(lambda: markdown_to_html_node(sample_markdown), repeat, 5),
+        "to_html": _best_of(root.to_html, repeat, 5),
+    }
+
+
+def full_build(root, jobs, repeat):
+    cwd = os.getcwd()
+    timings = []
+    try:
+        os.chdir(root)
+        for _ in range(repeat):
+            # Outputs left by the previous run would turn every write into
+            # an "unchanged" skip, so each run starts from an empty tree.
+            for path in ("docs", ".build"):
+                shutil.rmtree(path, ignore_errors=True)
+            start = time.perf_counter()
+            site_main.main(BuildOptions(jobs=jobs, quiet=True, render_cache_size=-1))
+            timings.append(time.perf_counter() - start)
+    finally:
+        os.chdir(cwd)
+    return min(timings)
+
+
+def run(spec, jobs=1, repeat=3):
+    with tempfile.TemporaryDirectory() as root:
+        paths = generate_corpus(root, spec)
+        with open(os.path.join(root, "content", paths[0])) as f:
+            sample = f.read()
+        build_seconds = full_build(root, jobs, repeat)
+        micro = micro_benchmarks(sample)
+
+    return {
+        "spec": spec.to_dict(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "jobs": jobs},
+        "full_build": {"seconds": build_seconds, "pages_per_sec": spec.pages / build_seconds},
+        "micro": micro,
+    }
+
+
+def compare(results, baseline, threshold):
+    # Every timing is "lower is better"; flag anything slower than the
+    # baseline by more than `threshold` (0.1 == 10%).
+    regressions = []
+    pairs = [("full_build", results["full_build"]["seconds"], baseline["full_build"]["seconds"])]
+    for name, seconds in results["micro"].items():
+        if name in baseline.get("micro", {}):
+            pairs.append((name, seconds, baseline["micro"][name]))
+    for name, current, previous in pairs:
+        if previous > 0 and (current - previous) / previous > threshold:
+            regressions.append({"name": name, "baseline": previous, "current": current})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site build on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks-per-page", type=int, default=20)
+    parser.add_argument("--list-length", type=int, default=8)
+    parser.add_argument("--link-density", type=float, default=0.1)
+    parser.add_argument("--nesting-depth", type=int, default=2)
+    parser.add_argument("--block-mix", help='JSON object of block weights, e.g. \'{"ordered_list": 5}\'')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown before failing")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        pages=args.pages,
+        blocks_per_page=args.blocks_per_page,
+        block_mix=json.loads(args.block_mix) if args.block_mix else None,
+        list_length=args.list_length,
+        link_density=args.link_density,
+        nesting_depth=args.nesting_depth,
+        seed=args.seed,
+    )
+    results = run(spec, args.jobs, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Full build: {results['full_build']['seconds']:.3f}s ({results['full_build']['pages_per_sec']:.0f} pages/sec)")
+    for name, seconds in results["micro"].items():
+        print(f"  {name:<22} {seconds * 1e6:10.1f}us")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for item in regressions:
+            print(
+                f"REGRESSION {item['name']}: {item['baseline'] * 1e3:.3f}ms -> {item['current'] * 1e3:.3f}ms",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# Builds the site as N shards in parallel processes, then merges them.
+N=${1:-4}
+pids=""
+for i in $(seq 1 "$N"); do
+    python3 src/main.py "/static_website-boot-dev/" -q --shard "$i/$N" &
+    pids="$pids $!"
+done
+for pid in $pids; do
+    wait "$pid" || exit 1
+done
+python3 src/main.py "/static_website-boot-dev/" -q --merge-shards "$N"
@@ -0,0 +1,158 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from discovery import scan_tree
+from manifest import hash_file
+from minify import minify_css
+from outputwriter import count_minified, minifies, write_output
+
+LARGE_FILE_THRESHOLD = 1 << 20
+
+# Linux FICLONE ioctl: share extents with the source (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+
+def _scan_files(root):
+    return {os.path.join(rel_dir, name): stat for rel_dir, name, stat in scan_tree(root)}
+
+
+def stamp_gzip(path):
+    # A .gz sibling carries the exact mtime of the file it compresses, so any
+    # later rewrite or copy of that file (even to an older mtime) shows it stale.
+    stat = os.stat(path)
+    os.utime(path + ".gz", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def is_current_gzip(path):
+    try:
+        return os.stat(path + ".gz").st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _is_current(src_path, src_stat, dest_path, dest_stat, checksum):
+    if dest_stat is None:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns and not checksum:
+        return True
+    if not checksum:
+        return False
+    if hash_file(src_path) != hash_file(dest_path):
+        return False
+    if src_stat.st_mtime_ns != dest_stat.st_mtime_ns:
+        shutil.copystat(src_path, dest_path)
+    return True
+
+
+def _reflink(src_path, dest_path):
+    import fcntl
+
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    shutil.copystat(src_path, dest_path)
+
+
+def copy_file(src_path, dest_path, link=None):
+    # Returns how the file got there: "linked", "reflinked" or "copied".
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if link == "hard":
+        try:
+            os.link(src_path, dest_path)
+            return "linked"
+        except OSError:
+            pass
+    elif link == "reflink":
+        try:
+            _reflink(src_path, dest_path)
+            return "reflinked"
+        except (ImportError, OSError):
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+    shutil.copy2(src_path, dest_path)
+    return "copied"
+
+
+def copy_asset(src_path, dest_path, link=None):
+    # Like copy_file, but stylesheets are minified on the way when --minify
+    # is on. Their bytes are compared with the output instead, since its size
+    # and mtime never match the source; "unchanged" means nothing was written.
+    if not (minifies() and src_path.endswith(".css")):
+        return copy_file(src_path, dest_path, link)
+    with open(src_path, "r", encoding="utf-8") as f:
+        css = f.read()
+    minified = minify_css(css)
+    count_minified(len(css.encode("utf-8")), len(minified.encode("utf-8")))
+    return "copied" if write_output(dest_path, minified) else "unchanged"
+
+
+def _remove_empty_dirs(root):
+    for dir_path, _, _ in sorted(os.walk(root), key=lambda item: len(item[0]), reverse=True):
+        if dir_path != root and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+
+
+def sync_directory(source_dir, dest_dir, keep=None, checksum=False, link=None, workers=4, source_files=None):
+    if not os.path.isdir(source_dir):
+        raise Exception("Folder path not existed!")
+
+    # source_files ({rel_path: stat}) lets a caller reuse a BuildPlan's scan.
+    src_files = source_files if source_files is not None else _scan_files(source_dir)
+    dest_files = _scan_files(dest_dir)
+    stats = {"copied": 0, "linked": 0, "reflinked": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+
+    # Hard links and reflinks only make sense within one filesystem.
+    os.makedirs(dest_dir, exist_ok=True)
+    if link is not None and os.stat(source_dir).st_dev != os.stat(dest_dir).st_dev:
+        link = None
+
+    large = []
+    for rel_path in sorted(src_files):
+        src_path = os.path.join(source_dir, rel_path)
+        dest_path = os.path.join(dest_dir, rel_path)
+        src_stat = src_files[rel_path]
+        if minifies() and rel_path.endswith(".css"):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            stats[copy_asset(src_path, dest_path)] += 1
+            continue
+        if _is_current(src_path, src_stat, dest_path, dest_files.get(rel_path), checksum):
+            stats["unchanged"] += 1
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        if src_stat.st_size >= LARGE_FILE_THRESHOLD and link is None:
+            large.append((src_path, dest_path, src_stat.st_size))
+            continue
+        stats[copy_file(src_path, dest_path, link)] += 1
+        stats["bytes"] += src_stat.st_size
+
+    if large:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(pool.submit(copy_file, src, dest, None), size) for src, dest, size in large]
+            for future, size in futures:
+                stats[future.result()] += 1
+                stats["bytes"] += size
+
+    keep = {os.path.normpath(path) for path in keep or ()}
+
+    def is_live(rel_path):
+        return rel_path in src_files or os.path.normpath(os.path.join(dest_dir, rel_path)) in keep
+
+    for rel_path in dest_files:
+        if is_live(rel_path):
+            continue
+        # Precompressed siblings go with the file they compress. Whether they
+        # are still current is only known once the pages have been written,
+        # so the build checks that afterwards.
+        if rel_path.endswith(".gz") and is_live(rel_path[:-3]):
+            continue
+        os.remove(os.path.join(dest_dir, rel_path))
+        stats["removed"] += 1
+    if stats["removed"]:
+        _remove_empty_dirs(dest_dir)
+
+    return stats
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import marshal
+import os
+import sys
+
+from depgraph import TITLE_LINK_RE, collects_urls
+from discovery import scan_tree
+from htmlnode import ParentNode
+from images import image_catalog_key
+from render_cache import RENDER_VERSION
+
+# Bump whenever parsing changes the trees it produces.
+PARSER_VERSION = 2
+# Entries are dropped, least recently used first, once the cache outgrows this.
+MAX_CACHE_BYTES = 256 << 20
+
+_cache = None
+
+
+def flatten_tree(root):
+    # Pre-order list of plain tuples, which marshal handles quickly and without
+    # recursing however deep the tree is:
+    # (1, tag, props, child count) for parents, (0, tag, value, props) for leaves.
+    flat = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            flat.append((1, node.tag, node.props, len(node.children)))
+            stack.extend(reversed(node.children))
+        else:
+            flat.append((0, node.tag, node.value, node.props))
+    return flat
+
+
+def _props_html(props):
+    if props is None:
+        return ""
+    return "".join([f" {prop}=\"{value}\"" for prop, value in props.items()])
+
+
+def iter_flat_html(flat):
+    # Serializes the flattened form directly, yielding the same HTML as
+    # iter_html on the original tree without rebuilding any nodes.
+    # open_parents holds [tag, children still to come] for each open element.
+    open_parents = []
+    for kind, tag, first, second in flat:
+        if kind == 1:
+            yield f"<{tag}{_props_html(first)}>"
+            if second > 0:
+                open_parents.append([tag, second])
+                continue
+            yield f"</{tag}>"
+        elif first is None:
+            raise ValueError("All leaf nodes must have a value")
+        elif tag is None:
+            yield first
+        else:
+            yield f"<{tag}{_props_html(second)}>{first}</{tag}>"
+        # This node is complete; close every parent it was the last child of.
+        while open_parents:
+            open_parents[-1][1] -= 1
+            if open_parents[-1][1] > 0:
+                break
+            yield f"</{open_parents.pop()[0]}>"
+
+
+class CachedTree:
+    # Stands in for a page's HTMLNode tree on a cache hit. Iterating it yields
+    # HTML fragments, which is all templates need to write the page.
+    __slots__ = ("flat",)
+
+    def __init__(self, flat):
+        self.flat = flat
+
+    def __iter__(self):
+        return iter_flat_html(self.flat)
+
+
+class AstCache:
+    # Parsed page trees on disk, one marshal file per entry, so a page whose
+    # markdown hasn't changed (e.g. on a template-only rebuild) skips parsing.
+    def __init__(self, path, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(markdown, base_path=None, refs=None):
+        # Besides the source, a tree depends on the base path, the sizes of any
+        # images it shows and the titles its title links picked up. marshal's
+        # format is tied to the Python version, so that is part of the key too.
+        digest = hashlib.sha256()
+        header = [PARSER_VERSION, RENDER_VERSION, list(sys.version_info[:2]), base_path or "/", collects_urls()]
+        header.append(image_catalog_key() if "![" in markdown else "")
+        if refs is not None and "[](" in markdown:
+            header.append([[url, refs.title(url)] for url in TITLE_LINK_RE.findall(markdown)])
+        digest.update(json.dumps(header).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + ".bin")
+
+    def load(self, key):
+        # Returns (root, title, summary, links, images, urls) or None.
+        path = self._entry_path(key)
+        try:
+            # One read plus loads() is far faster than marshal.load() on the file.
+            with open(path, "rb") as f:
+                title, summary, links, images, urls, flat = marshal.loads(f.read())
+            # The mtime marks when an entry was last used, for prune().
+            os.utime(path)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedTree(flat), title, summary, links, images, urls
+
+    def store(self, key, root, title, summary, refs=None):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        links = dict(refs.links) if refs is not None else {}
+        images = dict(refs.images) if refs is not None else {}
+        urls = dict(refs.urls) if refs is not None and refs.urls is not None else None
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps((title, summary, links, images, urls, flatten_tree(root))))
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        # Returns how many entries were removed to get under max_bytes.
+        entries = []
+        total = 0
+        for rel_dir, name, stat in scan_tree(self.path):
+            entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(self.path, rel_dir, name)))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def counters(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def add_counters(self, counters):
+        self.hits += counters["hits"]
+        self.misses += counters["misses"]
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.path}, {self.counters()})"
+
+
+def configure_ast_cache(path=None, max_bytes=MAX_CACHE_BYTES):
+    global _cache
+    _cache = AstCache(path, max_bytes) if path is not None else None
+    return _cache
+
+
+def get_ast_cache():
+    return _cache
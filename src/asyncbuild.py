@@ -0,0 +1,135 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from depgraph import page_dependencies, record_urls
+from makesite import discover_pages, is_quiet, render_markdown, stream_large_page
+from outputwriter import write_output
+from parallel import (
+    BuildError,
+    add_counters,
+    counter_delta,
+    counter_snapshot,
+    init_worker,
+    resolve_jobs,
+    worker_settings,
+)
+from profiler import build_stage
+from searchindex import get_page_terms_path, record_page_terms
+from siteindex import page_metadata
+from streaming import STREAMING_THRESHOLD
+from template import load_template
+
+
+def _read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def _counted(func, *args):
+    # Runs func in a worker and hands back this call's cache and output
+    # counters too, so the parent can keep build-wide totals.
+    before = counter_snapshot()
+    result = func(*args)
+    return result, counter_delta(before, counter_snapshot())
+
+
+class _DirectoryMaker:
+    # Each output directory is created once, however many pages land in it;
+    # concurrent callers for the same directory share one pending call.
+    def __init__(self, loop, executor):
+        self.loop = loop
+        self.executor = executor
+        self.pending = {}
+
+    async def ensure(self, path):
+        if not path:
+            return
+        future = self.pending.get(path)
+        if future is None:
+            future = self.loop.run_in_executor(self.executor, lambda: os.makedirs(path, exist_ok=True))
+            self.pending[path] = future
+        await future
+
+
+async def render_pages_async(pairs, template_path, base_path=None, jobs=1, io_concurrency=32, content_dir=None):
+    loop = asyncio.get_running_loop()
+    template = load_template(template_path, base_path)
+    quiet = is_quiet()
+
+    reads = asyncio.Semaphore(io_concurrency)
+    writes = asyncio.Semaphore(io_concurrency)
+    # Caps pages between "read" and "written" so sources don't pile up in
+    # memory while waiting for a renderer.
+    in_flight = asyncio.Semaphore(io_concurrency * 2)
+
+    jobs = resolve_jobs(jobs)
+    io_pool = ThreadPoolExecutor(max_workers=io_concurrency)
+    if jobs == 1:
+        cpu_pool = ThreadPoolExecutor(max_workers=1)
+    else:
+        cpu_pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=worker_settings())
+    directories = _DirectoryMaker(loop, io_pool)
+
+    async def run(func, *args):
+        if jobs == 1:
+            return await loop.run_in_executor(cpu_pool, func, *args)
+        result, counters = await loop.run_in_executor(cpu_pool, _counted, func, *args)
+        add_counters(counters)
+        return result
+
+    async def build_one(src_path, dest_path):
+        async with in_flight:
+            if not quiet:
+                print(f"Generating page from {src_path} to {dest_path} using {template_path}")
+            size = await loop.run_in_executor(io_pool, os.path.getsize, src_path)
+            if size >= STREAMING_THRESHOLD:
+                # Large pages are never read whole: the renderer streams them
+                # block by block from source to output, as on the pool path.
+                return await run(stream_large_page, src_path, template_path, dest_path, base_path, content_dir)
+            async with reads:
+                markdown = await loop.run_in_executor(io_pool, _read, src_path)
+            page, title, summary, refs = await run(render_markdown, markdown, template, base_path, content_dir)
+            await directories.ensure(os.path.dirname(dest_path))
+            async with writes:
+                await loop.run_in_executor(io_pool, write_output, dest_path, page)
+            metadata = page_metadata(src_path, dest_path, title, summary)
+            metadata["deps"] = page_dependencies(src_path, template, refs)
+            record_urls(metadata, refs)
+            if get_page_terms_path() is not None:
+                await loop.run_in_executor(io_pool, record_page_terms, metadata, markdown)
+            return metadata
+
+    try:
+        results = await asyncio.gather(
+            *(build_one(src_path, dest_path) for src_path, dest_path in pairs),
+            return_exceptions=True,
+        )
+    finally:
+        cpu_pool.shutdown()
+        io_pool.shutdown()
+
+    failures = []
+    pages = []
+    for (src_path, _), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            failures.append((src_path, f"{result.__class__.__name__}: {result}"))
+        else:
+            pages.append(result)
+    return failures, pages
+
+
+def generate_pages_async(
+    dir_path_content, template_path, dest_dir_path, base_path=None, jobs=1, io_concurrency=32, plan=None
+):
+    if plan is None:
+        with build_stage("discover"):
+            pairs = discover_pages(dir_path_content, dest_dir_path)
+    else:
+        pairs = plan.page_pairs()
+    failures, pages = asyncio.run(
+        render_pages_async(pairs, template_path, base_path, jobs, io_concurrency, dir_path_content)
+    )
+    if failures:
+        raise BuildError(failures)
+    return pages
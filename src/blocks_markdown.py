@@ -1,8 +1,10 @@
 import re
 from enum import Enum
+from functools import lru_cache
 
-from htmlnode import ParentNode
+from htmlnode import LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
+from profiler import NULL_TIMINGS
 from textnode import TextNode, TextType, text_node_to_html_node
 
 
@@ -27,49 +29,49 @@ def markdown_to_blocks(markdown):
     return str_list
 
 
-def is_unordered_list(lines):
-    for line in lines:
-        if not line.startswith("- "):
-            return False
-    return True
-
-
-def is_ordered_list(lines):
-    for index, line in enumerate(lines):
-        expected_prefix = f"{index + 1}. "
-        if not line.startswith(expected_prefix):
-            return False
-    return True
+ORDERED_ITEM_RE = re.compile(r"([0-9]+)\. ")
 
 
-def block_to_block_type(md_txt_block):
+@lru_cache(maxsize=256)
+def classify_block(md_txt_block):
+    # One pass over the block's lines: decides the block type and, for lists,
+    # returns the item text with its "- " / "N. " prefix already removed.
     md_txt_block = md_txt_block.strip()
     lines = md_txt_block.split("\n")
     first_line = lines[0]
-    last_line = lines[-1]
-
-    if first_line.startswith("```") and last_line.startswith("```"):
-        return BlockType.CODE
 
+    if first_line.startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODE, None
     if first_line.startswith("#"):
-        heading_counter = 0
-        for char in first_line:
-            if char == "#":
-                heading_counter += 1
-            else:
-                break
-        return BlockType.HEADING
-
+        return BlockType.HEADING, None
     if first_line.startswith(">"):
-        return BlockType.QUOTE
+        return BlockType.QUOTE, None
 
-    if is_unordered_list(lines):
-        return BlockType.UNORDERED_LIST
+    unordered = True
+    ordered = True
+    items = []
+    for index, line in enumerate(lines):
+        if unordered and not line.startswith("- "):
+            unordered = False
+        if ordered:
+            match = ORDERED_ITEM_RE.match(line)
+            number = match.group(1) if match else None
+            if number is None or number[0] == "0" or int(number) != index + 1:
+                ordered = False
+        if unordered:
+            items.append(line[2:].strip())
+        elif ordered:
+            items.append(line[match.end():].strip())
+        else:
+            return BlockType.PARAGRAPH, None
 
-    if is_ordered_list(lines):
-        return BlockType.ORDERED_LIST
+    if unordered:
+        return BlockType.UNORDERED_LIST, tuple(items)
+    return BlockType.ORDERED_LIST, tuple(items)
 
-    return BlockType.PARAGRAPH
+
+def block_to_block_type(md_txt_block):
+    return classify_block(md_txt_block)[0]
 
 
 def convert_line_type_to_html_tag(line_type, line=None):
@@ -119,46 +121,25 @@ def handle_clean_line(line_type, line):
         return line
 
 
-def clean_inner_line(inner_line):
-    line = inner_line.lstrip()  # bỏ space thừa bên trái cho chắc
-
-    if line.startswith("- ") or line.startswith("* "):
-        return line[2:].strip()
-
-    # xử lý dạng "1. text", "2. text"
-    match = re.match(r"^\d+\.\s*(.*)$", line)
-    if match:
-        return match.group(1).strip()
-
-    # nếu không khớp gì, trả lại như cũ
-    return line.strip()
-
-
-def markdown_to_html_node(md):
-    lines = markdown_to_blocks(md)
-    html_nodes = []
-
-    for line in lines:
-        line_type = block_to_block_type(line)
+def block_to_html_node(line, timings=NULL_TIMINGS):
+    with timings.stage("classify"):
+        line_type, items = classify_block(line)
         html_type = convert_line_type_to_html_tag(line_type, line)
         clean_line = handle_clean_line(line_type, line)
 
-        if line_type == BlockType.CODE:
-            text_node = TextNode(clean_line, TextType.TEXT)
-            code_html = text_node_to_html_node(text_node)
+    if line_type == BlockType.CODE:
+        text_node = TextNode(clean_line, TextType.TEXT)
+        code_html = text_node_to_html_node(text_node)
 
-            code_node = ParentNode(tag="code", children=[code_html])
+        code_node = ParentNode(tag="code", children=[code_html])
 
-            parent_node = ParentNode(tag=html_type, children=[code_node])
-            html_nodes.append(parent_node)
-        elif (
-            line_type == BlockType.UNORDERED_LIST or line_type == BlockType.ORDERED_LIST
-        ):
-            inner_lines = line.splitlines()
-            li_nodes = []
+        return ParentNode(tag=html_type, children=[code_node])
 
-            for inner_line in inner_lines:
-                cleaned_inner_line = clean_inner_line(inner_line)
+    if line_type == BlockType.UNORDERED_LIST or line_type == BlockType.ORDERED_LIST:
+        li_nodes = []
+
+        with timings.stage("inline"):
+            for cleaned_inner_line in items:
                 text_node_list = text_to_textnodes(cleaned_inner_line)
                 children = []
 
@@ -169,19 +150,33 @@ def markdown_to_html_node(md):
                 li_node = ParentNode(tag="li", children=children)
                 li_nodes.append(li_node)
 
-            parent_node = ParentNode(tag=html_type, children=li_nodes)
-            html_nodes.append(parent_node)
-        else:
-            text_node_list = text_to_textnodes(clean_line)
-            children = []
+        return ParentNode(tag=html_type, children=li_nodes)
 
-            for text_node in text_node_list:
-                html_node = text_node_to_html_node(text_node)
-                children.append(html_node)
+    with timings.stage("inline"):
+        text_node_list = text_to_textnodes(clean_line)
+        children = []
 
-            parent_node = ParentNode(tag=html_type, children=children)
-            html_nodes.append(parent_node)
+        for text_node in text_node_list:
+            html_node = text_node_to_html_node(text_node)
+            children.append(html_node)
+
+    return ParentNode(tag=html_type, children=children)
 
-    return ParentNode(tag="div", children=html_nodes)
 
+def markdown_to_html_node(md, cache=None, base_path=None, timings=NULL_TIMINGS):
+    with timings.stage("split"):
+        lines = markdown_to_blocks(md)
+    return blocks_to_html_node(lines, cache, base_path, timings)
 
+
+def blocks_to_html_node(lines, cache=None, base_path=None, timings=NULL_TIMINGS):
+    html_nodes = []
+
+    for line in lines:
+        if cache is None:
+            html_nodes.append(block_to_html_node(line, timings))
+        else:
+            # Cached blocks come back as finished HTML, wrapped in a tagless leaf.
+            html_nodes.append(LeafNode(None, cache.render(line, base_path, timings)))
+
+    return ParentNode(tag="div", children=html_nodes)
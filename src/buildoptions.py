@@ -0,0 +1,90 @@
+import os
+
+MANIFEST_PATH = os.path.join(".build", "manifest.json")
+RENDER_CACHE_PATH = os.path.join(".build", "render-cache.sqlite")
+IMAGE_CACHE_PATH = os.path.join(".build", "images")
+SHARD_DIR = os.path.join(".build", "shards")
+AST_CACHE_PATH = os.path.join(".build", "ast-cache")
+SEARCH_TERMS_PATH = os.path.join(".build", "search-terms")
+
+
+class BuildOptions:
+    # Everything a build runs with. main() makes one from the command line and
+    # worker processes are handed the same object, so a new setting is added
+    # here once instead of being threaded through every process boundary.
+    def __init__(
+        self,
+        base_path="/",
+        incremental=False,
+        jobs=1,
+        render_cache_size=4096,
+        render_cache_path=None,
+        watch_port=None,
+        quiet=False,
+        profile=None,
+        checksum=False,
+        link=None,
+        use_mmap=False,
+        site_index=False,
+        site_url=None,
+        index_page_size=10,
+        io_concurrency=None,
+        minify=False,
+        compress=False,
+        explain=False,
+        images=False,
+        shard=None,
+        merge_shard_count=None,
+        shard_dir=SHARD_DIR,
+        ast_cache_path=None,
+        link_check=None,
+        search_index=False,
+        search_terms_path=None,
+    ):
+        self.base_path = base_path
+        self.incremental = incremental
+        self.jobs = jobs
+        # None or a negative size turns the render cache off.
+        self.render_cache_size = render_cache_size
+        self.render_cache_path = render_cache_path
+        self.watch_port = watch_port
+        self.quiet = quiet
+        self.profile = profile
+        self.checksum = checksum
+        self.link = link
+        self.use_mmap = use_mmap
+        self.site_index = site_index
+        self.site_url = site_url
+        self.index_page_size = index_page_size
+        self.io_concurrency = io_concurrency
+        self.minify = minify
+        self.compress = compress
+        self.explain = explain
+        self.images = images
+        self.shard = shard
+        self.merge_shard_count = merge_shard_count
+        self.shard_dir = shard_dir
+        self.ast_cache_path = ast_cache_path
+        self.link_check = link_check
+        self.search_index = search_index
+        # Where pages' search postings are kept between builds; None means
+        # they aren't recorded while rendering.
+        self.search_terms_path = search_terms_path
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+_options = BuildOptions()
+
+
+def set_build_options(options):
+    global _options
+    _options = options
+
+
+def current_options():
+    return _options
@@ -0,0 +1,152 @@
+import os
+import re
+
+from buildoptions import current_options
+from images import image_attributes
+from inline_markdown import text_to_textnodes
+from textnode import TextType
+
+# "[](/blog/post/)": a link with no text borrows the linked page's title.
+TITLE_LINK_RE = re.compile(r"(?<!!)\[\]\((/[^()\s]*)\)")
+IMAGE_RE = re.compile(r"!\[[^]]+\]\(([^)]+)\)")
+
+_titles = {}
+
+
+def collects_urls():
+    # Only the link checker needs every URL, and collecting them costs an
+    # extra inline tokenization of each block with a link in it.
+    return current_options().link_check is not None
+
+
+def read_title(path):
+    # Only reads as far as the h1, and remembers the answer until the file changes.
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _titles:
+        title = None
+        with open(path, "r") as f:
+            for line in f:
+                stripped = line.lstrip()
+                if stripped.startswith("# "):
+                    title = stripped[2:].strip()
+                    break
+        _titles[key] = title
+    return _titles[key]
+
+
+def resolve_page(content_dir, url):
+    # Maps a site URL back to the markdown source that generates it.
+    path = url.split("#", 1)[0].split("?", 1)[0].strip("/")
+    if path.endswith(".html"):
+        path = path[: -len(".html")]
+    if path == "index" or path.endswith("/index"):
+        path = path[: -len("index")].rstrip("/")
+    candidates = [os.path.join(content_dir, path, "index.md")]
+    if path:
+        candidates.append(os.path.join(content_dir, path + ".md"))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return os.path.normpath(candidate)
+    return None
+
+
+class PageRefs:
+    # Fills in title links for one page and remembers each one it resolved,
+    # as {url: [source, title]}, plus the attributes of every image it shows,
+    # so the build can tell when they go stale. With URL collection on, urls
+    # gathers every link and image URL on the page, as {url: "link" or "image"},
+    # for the link checker; otherwise it is None.
+    def __init__(self, content_dir):
+        self.content_dir = content_dir
+        self.links = {}
+        self.images = {}
+        self.urls = {} if collects_urls() else None
+
+    def title(self, url):
+        if url not in self.links:
+            source = resolve_page(self.content_dir, url)
+            self.links[url] = [source, read_title(source) if source is not None else None]
+        return self.links[url][1]
+
+    def _fill(self, match):
+        url = match.group(1)
+        # Brackets would end the link text early; an unknown page shows its URL.
+        text = (self.title(url) or url).replace("[", "").replace("]", "")
+        return f"[{text}]({url})"
+
+    def fill(self, block):
+        if block.startswith("```"):
+            return block
+        if "![" in block:
+            for url in IMAGE_RE.findall(block):
+                self.images[url] = image_attributes(url)
+        if self.urls is not None and "](" in block:
+            self._collect_urls(block)
+        if "[](" not in block:
+            return block
+        return TITLE_LINK_RE.sub(self._fill, block)
+
+    def _collect_urls(self, block):
+        # The inline tokenizer decides what is a link, exactly as when the
+        # block is rendered. A block it rejects fails to render anyway.
+        try:
+            nodes = text_to_textnodes(block)
+        except Exception:
+            return
+        for node in nodes:
+            if node.text_type == TextType.LINK:
+                self.urls.setdefault(node.url, "link")
+            elif node.text_type == TextType.IMAGE:
+                self.urls.setdefault(node.url, "image")
+
+    def watch(self, blocks):
+        for block in blocks:
+            yield self.fill(block)
+
+
+def record_urls(metadata, refs):
+    if refs is not None and refs.urls is not None:
+        metadata["urls"] = dict(refs.urls)
+
+
+def page_dependencies(source, template, refs=None):
+    # Everything a page was built from: its own source, the template and its
+    # partials, the titles of the pages it linked to and its images' sizes.
+    return {
+        "files": [os.path.normpath(source)] + list(template.dependencies),
+        "links": dict(refs.links) if refs is not None else {},
+        "images": dict(refs.images) if refs is not None else {},
+    }
+
+
+def explain_stale(entry, previous, dest_path, changed_files, current_links, current_images=image_attributes):
+    # Returns why a page must be rebuilt, or None if its output is still good.
+    # current_links(url) gives the [source, title] the link would resolve to now,
+    # current_images(url) the attributes an image would be given now.
+    if previous is None:
+        return "new page"
+    if not os.path.exists(dest_path):
+        return "output is missing"
+    if previous.get("hash") != entry["hash"]:
+        return "source changed"
+    if previous.get("dest") != entry["dest"]:
+        return "output path changed"
+    deps = previous.get("meta", {}).get("deps")
+    if deps is None:
+        return "no dependency record"
+    for path in deps["files"]:
+        if path in changed_files:
+            return f"{path} changed"
+    for url, recorded in deps["links"].items():
+        current = current_links(url)
+        if current[0] != recorded[0]:
+            return f"link {url} now points at {current[0] or 'nothing'}"
+        if current[1] != recorded[1]:
+            return f"title of {current[0]} changed"
+    for url, attributes in deps.get("images", {}).items():
+        if current_images(url) != attributes:
+            return f"image {url} changed"
+    if collects_urls() and "urls" not in previous["meta"]:
+        return "links not recorded"
+    return None
@@ -0,0 +1,154 @@
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from discovery import scan_tree
+from template import load_template
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVE_RELOAD_PATH + "\")"
+    ".addEventListener(\"reload\", () => location.reload());</script>"
+)
+
+
+class LiveReload:
+    def __init__(self):
+        self.generation = 0
+        self._changed = threading.Condition()
+
+    def notify(self):
+        with self._changed:
+            self.generation += 1
+            self._changed.notify_all()
+
+    def wait(self, generation, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def inject_reload_script(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    live_reload = None
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            self._stream_reload_events()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "r") as f:
+            body = inject_reload_script(f.read()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.live_reload.generation
+        try:
+            while True:
+                current = self.live_reload.wait(generation, timeout=15)
+                if current != generation:
+                    generation = current
+                    self.wfile.write(b"event: reload\ndata: {}\n\n")
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory, port, live_reload):
+    handler = functools.partial(DevRequestHandler, directory=directory)
+    DevRequestHandler.live_reload = live_reload
+    server = ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for rel_dir, name, stat in scan_tree(path):
+            state[os.path.join(path, rel_dir, name)] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def _template_inputs(template_path, base_path):
+    # The template plus whatever partials it currently includes.
+    try:
+        return load_template(template_path, base_path).dependencies
+    except (OSError, ValueError):
+        return [template_path]
+
+
+def watch(content_dir, static_dir, template_path, dest_dir, base_path, build, port=8888, interval=0.05, stop=None):
+    # build() runs one incremental build. It is called again whenever an
+    # input changes, until Ctrl+C or until the stop event is set.
+    def rebuild():
+        started = time.perf_counter()
+        try:
+            build()
+        except Exception as e:
+            # A failed build (a template caught mid-save, a broken partial, a
+            # page that won't render) must not end the session; the next
+            # change gets another try.
+            print(f"Build failed: {e.__class__.__name__}: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Rebuilt in {elapsed:.0f}ms")
+
+    rebuild()
+    live_reload = LiveReload()
+    server = start_server(dest_dir, port, live_reload)
+    print(f"Serving {dest_dir} on http://localhost:{server.server_address[1]}/ (Ctrl+C to stop)")
+
+    previous = snapshot([content_dir, static_dir] + _template_inputs(template_path, base_path))
+    try:
+        while stop is None or not stop.is_set():
+            time.sleep(interval)
+            try:
+                current = snapshot([content_dir, static_dir] + _template_inputs(template_path, base_path))
+            except OSError:
+                # A file vanished mid-scan (editors save by rename); look again.
+                continue
+            if current != previous:
+                previous = current
+                rebuild()
+                live_reload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,93 @@
+import os
+
+
+class PlanEntry:
+    __slots__ = ("source", "dest", "stat")
+
+    def __init__(self, source, dest, stat):
+        self.source = source
+        self.dest = dest
+        self.stat = stat
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.source}, {self.dest})"
+
+
+class BuildPlan:
+    # Flat list of everything a build reads and writes. Each entry carries the
+    # stat result scandir already fetched, so consumers never stat it again.
+    def __init__(self, pages, assets):
+        self.pages = pages
+        self.assets = assets
+
+    def page_pairs(self):
+        return [(entry.source, entry.dest) for entry in self.pages]
+
+    def page_dests(self):
+        return [entry.dest for entry in self.pages]
+
+    def asset_stats(self):
+        return {entry.rel_path: entry.stat for entry in self.assets}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(pages: {len(self.pages)}, assets: {len(self.assets)})"
+
+
+class AssetEntry(PlanEntry):
+    __slots__ = ("rel_path",)
+
+    def __init__(self, source, dest, stat, rel_path):
+        super().__init__(source, dest, stat)
+        self.rel_path = rel_path
+
+
+def scan_tree(root):
+    # One scandir pass; returns (rel_dir, name, stat) in the same order as a
+    # sorted os.walk: a directory's files come before its subdirectories'.
+    # Symlinked directories are followed, except into one of their own
+    # ancestors, so a link loop can't recurse forever.
+    found = []
+    if not os.path.isdir(root):
+        return found
+    root_stat = os.stat(root)
+    stack = [((), {(root_stat.st_dev, root_stat.st_ino)})]
+    while stack:
+        parts, ancestors = stack.pop()
+        with os.scandir(os.path.join(root, *parts)) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # A dangling symlink.
+                    continue
+                if entry.is_dir():
+                    key = (stat.st_dev, stat.st_ino)
+                    if key not in ancestors:
+                        stack.append((parts + (entry.name,), ancestors | {key}))
+                else:
+                    found.append((parts, entry.name, stat))
+    found.sort(key=lambda item: (item[0], item[1]))
+    return [(os.path.join(*parts) if parts else "", name, stat) for parts, name, stat in found]
+
+
+def plan_pages(content_dir, dest_dir):
+    pages = []
+    for rel_dir, name, stat in scan_tree(content_dir):
+        if name.endswith(".md"):
+            new_name = name.replace(".md", ".html")
+            source = os.path.join(content_dir, rel_dir, name)
+            pages.append(PlanEntry(source, os.path.normpath(os.path.join(dest_dir, rel_dir, new_name)), stat))
+    return pages
+
+
+def plan_assets(static_dir, dest_dir):
+    assets = []
+    for rel_dir, name, stat in scan_tree(static_dir):
+        rel_path = os.path.join(rel_dir, name)
+        source = os.path.join(static_dir, rel_path)
+        assets.append(AssetEntry(source, os.path.normpath(os.path.join(dest_dir, rel_path)), stat, rel_path))
+    return assets
+
+
+def build_plan(content_dir, static_dir, dest_dir):
+    return BuildPlan(plan_pages(content_dir, dest_dir), plan_assets(static_dir, dest_dir))
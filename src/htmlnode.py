@@ -1,8 +1,13 @@
+import sys
+
 
 class HTMLNode:
- 
+    # Pages create one node per inline span; slots keep each node to a few
+    # pointers instead of a per-instance dict.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
@@ -13,17 +18,15 @@ class HTMLNode:
     def props_to_html(self):
         if self.props is None:
             return ""
-        rv = ""
-        for prop in self.props:
-            rv += (f" {prop}=\"{self.props[prop]}\"")
-
-        return rv
+        return "".join([f" {prop}=\"{value}\"" for prop, value in self.props.items()])
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         super().__init__(tag=tag, value=value, props=props)
 
@@ -38,6 +41,8 @@ class LeafNode(HTMLNode):
         return f"{self.__class__.__name__}({self.tag}, {self.value}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
         super().__init__(tag=tag, children=children, props=props)
 
@@ -46,8 +51,56 @@ class ParentNode(HTMLNode):
             raise ValueError("All parent nodes must have a tag")
         if self.children is None:
             raise ValueError("Parent nodes must have children")
-        kinderstring = ""
-        for child in self.children:
-            kinderstring += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{kinderstring}</{self.tag}>"
+        return "".join(iter_html(self))
+
+
+def iter_html(node):
+    # Explicit stack instead of recursion: deep trees can't hit the recursion
+    # limit and no intermediate strings are built for each subtree.
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, ParentNode):
+            if item.tag is None:
+                raise ValueError("All parent nodes must have a tag")
+            if item.children is None:
+                raise ValueError("Parent nodes must have children")
+            yield f"<{item.tag}{item.props_to_html()}>"
+            stack.append(f"</{item.tag}>")
+            stack.extend(reversed(item.children))
+        else:
+            yield item.to_html()
+
+
+def write_html(node, sink):
+    if hasattr(sink, "write"):
+        for fragment in iter_html(node):
+            sink.write(fragment)
+    else:
+        sink.extend(iter_html(node))
+    return sink
+
 
+def apply_base_path(root, base_path):
+    if base_path is None or base_path == "/":
+        return root
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            for attr in ("href", "src"):
+                url = node.props.get(attr)
+                if url is not None and url.startswith("/"):
+                    node.props[attr] = base_path + url[1:]
+            srcset = node.props.get("srcset")
+            if srcset is not None:
+                candidates = [candidate.strip() for candidate in srcset.split(",")]
+                node.props["srcset"] = ", ".join(
+                    base_path + candidate[1:] if candidate.startswith("/") else candidate
+                    for candidate in candidates
+                )
+        if node.children:
+            stack.extend(node.children)
+    return root
@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from manifest import fingerprint
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Narrower copies offered through srcset; only widths below the original are made.
+VARIANT_WIDTHS = (480, 960)
+# Bump whenever resizing or encoding changes so cached variants are rebuilt.
+IMAGE_VERSION = 1
+
+# Samples per pixel for the 8-bit colour types we can resize.
+_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+# Colour-space chunks carried over to variants so they look like the original.
+_COLOUR_CHUNKS = (b"sRGB", b"gAMA", b"cHRM", b"iCCP")
+# What decoding a PNG we can't resize raises: unsupported flavours, and
+# corrupt or truncated image data behind a valid header.
+DECODE_ERRORS = (ValueError, IndexError, struct.error, zlib.error)
+
+_catalog = None
+_catalog_key = ""
+
+
+def set_image_catalog(catalog):
+    # catalog maps site URLs ("/images/tom.png") to the attributes their <img>
+    # tags get; None turns the image stage off.
+    global _catalog, _catalog_key
+    _catalog = catalog
+    if catalog is None:
+        _catalog_key = ""
+    else:
+        data = json.dumps(catalog, sort_keys=True).encode("utf-8")
+        _catalog_key = hashlib.sha256(data).hexdigest()
+
+
+def get_image_catalog():
+    return _catalog
+
+
+def image_catalog_key():
+    return _catalog_key
+
+
+def image_attributes(url):
+    if _catalog is None or url not in _catalog:
+        return {}
+    entry = _catalog[url]
+    attributes = {"width": str(entry["width"]), "height": str(entry["height"])}
+    if entry.get("srcset"):
+        attributes["srcset"] = entry["srcset"]
+    attributes["loading"] = "lazy"
+    attributes["decoding"] = "async"
+    return attributes
+
+
+def png_size(path):
+    # Width and height sit at a fixed offset in the IHDR chunk, so 24 bytes do.
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError(f"Not a PNG file: {path}")
+    return struct.unpack(">II", header[16:24])
+
+
+def _chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos : pos + 8])
+        yield kind, data[pos + 8 : pos + 8 + length]
+        pos += 12 + length
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(kind, line, prev, bpp):
+    if kind == 1:
+        for i in range(bpp, len(line)):
+            line[i] = (line[i] + line[i - bpp]) & 0xFF
+    elif kind == 2:
+        line[:] = bytes((x + y) & 0xFF for x, y in zip(line, prev))
+    elif kind == 3:
+        for i in range(len(line)):
+            left = line[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+    elif kind == 4:
+        for i in range(len(line)):
+            if i >= bpp:
+                line[i] = (line[i] + _paeth(line[i - bpp], prev[i], prev[i - bpp])) & 0xFF
+            else:
+                line[i] = (line[i] + prev[i]) & 0xFF
+    elif kind != 0:
+        raise ValueError(f"Invalid PNG filter type: {kind}")
+
+
+def decode_png(path):
+    # Returns (width, height, colour type, rows, extra chunks) for 8-bit,
+    # non-interlaced images; anything else raises ValueError.
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"Not a PNG file: {path}")
+    header = None
+    idat = []
+    extra = []
+    for kind, body in _chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind in _COLOUR_CHUNKS:
+            extra.append((kind, body))
+    if header is None:
+        raise ValueError(f"PNG without IHDR: {path}")
+    width, height, depth, colour, _, _, interlace = header
+    if depth != 8 or colour not in _CHANNELS or interlace:
+        raise ValueError(f"Unsupported PNG format in {path}: depth {depth}, colour type {colour}")
+
+    bpp = _CHANNELS[colour]
+    stride = width * bpp
+    raw = zlib.decompress(b"".join(idat))
+    rows = []
+    prev = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        line = bytearray(raw[start + 1 : start + 1 + stride])
+        _unfilter(raw[start], line, prev, bpp)
+        rows.append(line)
+        prev = line
+    return width, height, colour, rows, extra
+
+
+def _spans(size, new_size):
+    # Source index range each output index averages over.
+    spans = []
+    for i in range(new_size):
+        start = i * size // new_size
+        spans.append((start, max((i + 1) * size // new_size, start + 1)))
+    return spans
+
+
+def resize_rows(rows, width, channels, new_width, new_height):
+    # Box filter: each output pixel is the mean of the source pixels it covers.
+    # Done one axis at a time so each pass works on flat per-channel slices.
+    xs = _spans(width, new_width)
+    narrow = []
+    for row in rows:
+        out = bytearray(new_width * channels)
+        for c in range(channels):
+            plane = row[c::channels]
+            out[c::channels] = bytes((sum(plane[a:b]) + (b - a) // 2) // (b - a) for a, b in xs)
+        narrow.append(out)
+
+    resized = []
+    for a, b in _spans(len(rows), new_height):
+        band = narrow[a:b]
+        n = len(band)
+        if n == 1:
+            resized.append(band[0])
+        else:
+            resized.append(bytearray((sum(column) + n // 2) // n for column in zip(*band)))
+    return resized
+
+
+def _chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def encode_png(rows, width, height, colour, extra=()):
+    # Every row uses the Sub filter: cheap to compute and much smaller than
+    # unfiltered rows for photographs.
+    bpp = _CHANNELS[colour]
+    raw = bytearray()
+    for row in rows:
+        filtered = bytearray(row)
+        for i in range(len(row) - 1, bpp - 1, -1):
+            filtered[i] = (row[i] - row[i - bpp]) & 0xFF
+        raw.append(1)
+        raw.extend(filtered)
+    parts = [PNG_SIGNATURE, _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, colour, 0, 0, 0))]
+    parts.extend(_chunk(kind, body) for kind, body in extra)
+    parts.append(_chunk(b"IDAT", zlib.compress(bytes(raw), 9)))
+    parts.append(_chunk(b"IEND", b""))
+    return b"".join(parts)
+
+
+def _make_variants(job):
+    # Decodes the source once and writes every requested width to the cache.
+    source, targets = job
+    width, height, colour, rows, extra = decode_png(source)
+    for new_width, cache_path in targets:
+        new_height = max(1, round(height * new_width / width))
+        resized = resize_rows(rows, width, _CHANNELS[colour], new_width, new_height)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_png(resized, new_width, new_height, colour, extra))
+        os.replace(tmp_path, cache_path)
+    return source
+
+
+def _variant_name(name, width):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}-{width}w{ext}"
+
+
+def _load_index(path):
+    try:
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if index.get("version") == IMAGE_VERSION else {}
+
+
+def _run_jobs(work, jobs):
+    # Returns the sources that could not be decoded (unsupported PNG flavours
+    # or damaged image data).
+    failed = set()
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as pool:
+            futures = [(job[0], pool.submit(_make_variants, job)) for job in work]
+            for source, future in futures:
+                try:
+                    future.result()
+                except DECODE_ERRORS:
+                    failed.add(source)
+    else:
+        for job in work:
+            try:
+                _make_variants(job)
+            except DECODE_ERRORS:
+                failed.add(job[0])
+    return failed
+
+
+def _copy_if_changed(src_path, dest_path):
+    # copy2 keeps the mtime, so size and mtime identify an up-to-date copy.
+    src_stat = os.stat(src_path)
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        dest_stat = None
+    if dest_stat is None or (dest_stat.st_size, dest_stat.st_mtime_ns) != (src_stat.st_size, src_stat.st_mtime_ns):
+        # Variants are placed before the static sync, which creates dest dirs.
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copy2(src_path, dest_path)
+
+
+def _prune_cache(cache_dir, keep):
+    # Drops variants of images that changed or went away since they were made.
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name != "index.json" and path not in keep and os.path.isfile(path):
+            os.remove(path)
+
+
+def build_images(assets, cache_dir, jobs=1, widths=VARIANT_WIDTHS):
+    # assets are the BuildPlan's AssetEntry objects. Variants are cached by
+    # source hash under cache_dir, so they are only recomputed when an image
+    # changes, then copied next to the original in the output tree.
+    # Returns (catalog, variant output paths).
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, "index.json")
+    old_index = _load_index(index_path).get("files", {})
+    new_index = {}
+
+    images = []
+    work = []
+    for asset in assets:
+        if not asset.source.lower().endswith(".png"):
+            continue
+        try:
+            width, height = png_size(asset.source)
+        except ValueError:
+            continue
+        entry = fingerprint(asset.source, old_index.get(asset.source), asset.stat)
+        new_index[asset.source] = entry
+
+        variants = []
+        for new_width in sorted(w for w in widths if w < width):
+            cache_path = os.path.join(cache_dir, f"{entry['hash'][:20]}-{new_width}.png")
+            name = _variant_name(os.path.basename(asset.dest), new_width)
+            variants.append((new_width, cache_path, os.path.join(os.path.dirname(asset.dest), name)))
+        missing = [(new_width, cache_path) for new_width, cache_path, _ in variants if not os.path.exists(cache_path)]
+        if missing:
+            work.append((asset.source, missing))
+        images.append((asset, width, height, variants))
+
+    failed = _run_jobs(work, jobs)
+
+    catalog = {}
+    outputs = []
+    for asset, width, height, variants in images:
+        url = "/" + asset.rel_path.replace(os.sep, "/")
+        folder = url.rsplit("/", 1)[0]
+        srcset = None
+        # Images we can't resize (16-bit, palette, interlaced, damaged) still
+        # get their dimensions, just no srcset.
+        if variants and asset.source not in failed:
+            candidates = []
+            for new_width, cache_path, dest_path in variants:
+                _copy_if_changed(cache_path, dest_path)
+                outputs.append(dest_path)
+                candidates.append(f"{folder}/{os.path.basename(dest_path)} {new_width}w")
+            srcset = ", ".join(candidates + [f"{url} {width}w"])
+        catalog[url] = {"width": width, "height": height, "srcset": srcset}
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": IMAGE_VERSION, "files": new_index}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_path)
+    _prune_cache(cache_dir, {cache_path for _, _, _, variants in images for _, cache_path, _ in variants})
+    return catalog, outputs
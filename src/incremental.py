@@ -0,0 +1,172 @@
+import os
+
+from assetsync import copy_asset
+from depgraph import explain_stale, read_title, resolve_page
+from discovery import build_plan
+from images import build_images, set_image_catalog
+from manifest import empty_manifest, fingerprint, load_manifest, save_manifest
+from outputwriter import minifies
+from parallel import BuildError, render_pages, resolve_jobs
+from profiler import build_stage
+from searchindex import get_page_terms_path
+from template import load_template
+
+
+def _is_stale(entry, previous, dest_path):
+    if previous is None or not os.path.exists(dest_path):
+        return True
+    return previous.get("hash") != entry["hash"] or previous.get("dest") != entry["dest"]
+
+
+def _remove_output(dest_path, dest_dir, live_outputs):
+    # A precompressed sibling goes too, unless static/ ships it as an asset.
+    paths = [dest_path]
+    if dest_path + ".gz" not in live_outputs:
+        paths.append(dest_path + ".gz")
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    # Tidy up directories left empty by the removal, but never the root.
+    dir_path = os.path.dirname(dest_path)
+    root = os.path.abspath(dest_dir)
+    while os.path.abspath(dir_path) != root and os.path.isdir(dir_path) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
+
+
+def _changed_files(old_files, new_files):
+    changed = {path for path in old_files if path not in new_files}
+    for path, entry in new_files.items():
+        previous = old_files.get(path)
+        if previous is None or previous["hash"] != entry["hash"]:
+            changed.add(path)
+    return changed
+
+
+def _fingerprint_plan(plan, old, template_path, base_path):
+    # A manifest for plan's inputs, hashing only files whose size or mtime
+    # moved since old was recorded.
+    new = empty_manifest()
+    new["base_path"] = base_path
+    new["minify"] = minifies()
+    # Shared inputs (the template and its partials) are fingerprinted once;
+    # each page then only checks whether the ones it read have moved.
+    for path in load_template(template_path, base_path).dependencies:
+        new["files"][path] = fingerprint(path, old["files"].get(path))
+    for section, entries in (("assets", plan.assets), ("pages", plan.pages)):
+        for item in entries:
+            entry = fingerprint(item.source, old[section].get(item.source), item.stat)
+            entry["dest"] = item.dest
+            new[section][item.source] = entry
+    return new
+
+
+def save_build_manifest(manifest_path, previous, plan, template_path, base_path, pages, variants=()):
+    # Called after a full build, which rendered every page in plan, so the
+    # next incremental build only redoes what changes after it. previous is
+    # the manifest the full build replaced, whose hashes are reused.
+    new = _fingerprint_plan(plan, previous, template_path, base_path)
+    new["variants"] = list(variants)
+    for metadata in pages:
+        new["pages"][metadata["source"]]["meta"] = metadata
+    save_manifest(manifest_path, new)
+
+
+def build_incremental(
+    content_dir, static_dir, template_path, dest_dir, base_path, manifest_path, jobs=1, image_cache_dir=None
+):
+    with build_stage("discover"):
+        plan = build_plan(content_dir, static_dir, dest_dir)
+
+    old = load_manifest(manifest_path)
+    new = _fingerprint_plan(plan, old, template_path, base_path)
+    # Every output is written differently when --minify is toggled.
+    minify_changed = old.get("minify", False) != new["minify"]
+    changed_files = _changed_files(old["files"], new["files"])
+
+    stats = {"copied": 0, "generated": 0, "skipped": 0, "removed": 0, "reasons": []}
+    os.makedirs(dest_dir, exist_ok=True)
+
+    for asset in plan.assets:
+        src_path, dest_path = asset.source, asset.dest
+        if minify_changed or _is_stale(new["assets"][src_path], old["assets"].get(src_path), dest_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_asset(src_path, dest_path)
+            stats["copied"] += 1
+        else:
+            stats["skipped"] += 1
+
+    # Image sizes feed into page staleness below, so the catalog comes first.
+    if image_cache_dir is not None:
+        catalog, new["variants"] = build_images(plan.assets, image_cache_dir, resolve_jobs(jobs))
+        set_image_catalog(catalog)
+
+    links = {}
+
+    def current_link(url):
+        # A linked page whose source hash hasn't moved still has the title
+        # recorded last time, so only edited pages are read again.
+        if url not in links:
+            source = resolve_page(content_dir, url)
+            title = None
+            if source is not None:
+                before, now = old["pages"].get(source), new["pages"].get(source)
+                if before is not None and now is not None and before["hash"] == now["hash"] and "meta" in before:
+                    title = before["meta"]["title"]
+                else:
+                    title = read_title(source)
+            links[url] = [source, title]
+        return links[url]
+
+    stale_pages = []
+    for page in plan.pages:
+        src_path, dest_path = page.source, page.dest
+        previous = old["pages"].get(src_path)
+        if previous is not None and old["base_path"] != base_path:
+            reason = "base path changed"
+        elif previous is not None and minify_changed:
+            reason = "minify setting changed"
+        elif previous is not None and get_page_terms_path() is not None and "search" not in previous.get("meta", {}):
+            reason = "search terms not recorded"
+        else:
+            reason = explain_stale(new["pages"][src_path], previous, dest_path, changed_files, current_link)
+        if reason is None:
+            stats["skipped"] += 1
+        else:
+            stale_pages.append((src_path, dest_path))
+            stats["reasons"].append((src_path, reason))
+
+    failures, rendered = render_pages(stale_pages, template_path, base_path, jobs, content_dir)
+    stats["generated"] = len(rendered)
+    # Pages that were skipped keep the metadata recorded when they were last
+    # rendered, so the site index never needs to re-parse them.
+    for metadata in rendered:
+        new["pages"][metadata["source"]]["meta"] = metadata
+    for src_path, entry in new["pages"].items():
+        if "meta" not in entry:
+            previous = old["pages"].get(src_path)
+            if previous is not None and "meta" in previous:
+                entry["meta"] = previous["meta"]
+
+    live_outputs = {entry["dest"] for entry in new["pages"].values()}
+    live_outputs.update(entry["dest"] for entry in new["assets"].values())
+    live_outputs.update(new["variants"])
+    for section in ("pages", "assets"):
+        for src_path, entry in old[section].items():
+            if src_path not in new[section] and entry["dest"] not in live_outputs:
+                _remove_output(entry["dest"], dest_dir, live_outputs)
+                stats["removed"] += 1
+    for dest_path in old.get("variants", []):
+        if dest_path not in live_outputs:
+            _remove_output(dest_path, dest_dir, live_outputs)
+            stats["removed"] += 1
+
+    # Failed pages stay out of the manifest so the next build retries them.
+    for src_path, _ in failures:
+        del new["pages"][src_path]
+
+    save_manifest(manifest_path, new)
+    if failures:
+        raise BuildError(failures)
+    stats["pages"] = [entry["meta"] for entry in new["pages"].values() if "meta" in entry]
+    return stats
@@ -92,7 +92,7 @@ def split_nodes_link(old_nodes):
 
     return node_list
 
-def text_to_textnodes(text):
+def text_to_textnodes_staged(text):
     nodes = [TextNode(text=text, text_type=TextType.TEXT)]
 
     nodes = split_nodes_image(nodes)
@@ -103,3 +103,61 @@ def text_to_textnodes(text):
     nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
 
     return nodes
+
+
+INLINE_TOKEN_RE = re.compile(
+    r"!\[(?P<alt>[^]]+)\]\((?P<src>[^)]+)\)"
+    r"|(?<!!)\[(?P<text>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)"
+    r"|(?P<delim>\*\*|_|`)"
+)
+
+_DELIMITER_TYPES = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
+# Delimiters that are plain text inside an open span. Anything else seen inside
+# a span is an error: the staged pipeline splits on ** first, then _, then `,
+# so e.g. a _ inside a code span always leaves an unbalanced backtick.
+_LITERAL_INSIDE = {
+    TextType.BOLD: {"_", "`"},
+    TextType.ITALIC: {"`"},
+    TextType.CODE: set(),
+}
+
+
+def text_to_textnodes(text):
+    # Single left-to-right scan producing the same nodes as
+    # text_to_textnodes_staged without re-scanning or re-splitting the text.
+    nodes = []
+    open_type = None
+    start = 0
+
+    for match in INLINE_TOKEN_RE.finditer(text):
+        delimiter = match.group("delim")
+
+        if open_type is not None:
+            if delimiter is not None and delimiter in _LITERAL_INSIDE[open_type]:
+                continue
+            if delimiter is None or _DELIMITER_TYPES[delimiter] != open_type:
+                raise Exception("Invalid markdown syntax: missing closing delimiter")
+            if match.start() > start:
+                nodes.append(TextNode(text[start:match.start()], open_type))
+            open_type = None
+            start = match.end()
+            continue
+
+        if match.start() > start:
+            nodes.append(TextNode(text[start:match.start()], TextType.TEXT))
+        start = match.end()
+
+        if delimiter is not None:
+            open_type = _DELIMITER_TYPES[delimiter]
+        elif match.group("alt") is not None:
+            nodes.append(TextNode(match.group("alt"), TextType.IMAGE, match.group("src")))
+        else:
+            nodes.append(TextNode(match.group("text"), TextType.LINK, match.group("href")))
+
+    if open_type is not None:
+        raise Exception("Invalid markdown syntax: missing closing delimiter")
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
+
+    return nodes
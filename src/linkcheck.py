@@ -0,0 +1,74 @@
+import os
+import posixpath
+from urllib.parse import unquote, urljoin, urlsplit
+
+from discovery import scan_tree
+from siteindex import page_url
+
+
+class LinkError(Exception):
+    def __init__(self, broken):
+        self.broken = broken
+        super().__init__(f"{len(broken)} broken links:\n" + "\n".join(format_broken(broken)))
+
+
+def _site_root(base_path):
+    base_path = base_path or "/"
+    return base_path if base_path.endswith("/") else base_path + "/"
+
+
+def build_link_index(dest_dir, base_path=None):
+    # Every path the output tree answers to, as a set so each link costs one
+    # lookup. Directories are reachable with and without the trailing slash
+    # and pages without their .html, as static hosts serve them.
+    root = _site_root(base_path)
+    index = set()
+    for rel_dir, name, _ in scan_tree(dest_dir):
+        rel_path = f"{rel_dir.replace(os.sep, '/')}/{name}" if rel_dir else name
+        url = root + rel_path
+        index.add(url)
+        if name == "index.html":
+            folder = url[: -len("index.html")]
+            index.add(folder)
+            index.add(folder.rstrip("/") or "/")
+        elif name.endswith(".html"):
+            index.add(url[: -len(".html")])
+    return index
+
+
+def resolve_link(url, page, base_path=None):
+    # Returns the path a link from page (the page's own URL, base path
+    # included) reaches once the base path rewrite has been applied, or None
+    # for links that leave the site or stay on the same page.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        path = _site_root(base_path) + path[1:]
+    else:
+        path = urljoin(page, path)
+    normalized = posixpath.normpath(path)
+    if path.endswith("/") and normalized != "/":
+        normalized += "/"
+    return normalized
+
+
+def check_links(pages, dest_dir, base_path=None):
+    # pages is the build's page metadata; each page's "urls" were collected
+    # while its tree was built. Returns [(source, url, kind)] for every
+    # internal link or image that nothing in dest_dir answers to.
+    index = build_link_index(dest_dir, base_path)
+    root = _site_root(base_path)
+    broken = []
+    for page in sorted(pages, key=lambda page: page["source"]):
+        here = root + page_url(page["dest"], dest_dir)[1:]
+        for url, kind in page.get("urls", {}).items():
+            target = resolve_link(url, here, base_path)
+            if target is not None and target not in index:
+                broken.append((page["source"], url, kind))
+    return broken
+
+
+def format_broken(broken):
+    return [f"  {source}: {kind} {url}" for source, url, kind in broken]
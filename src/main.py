@@ -1,24 +1,384 @@
+import argparse
 import os
-import shutil
+import sys
 
-from makesite import copy_directory_contents, generate_pages_recursive
+from assetsync import sync_directory
+from asyncbuild import generate_pages_async
+from buildoptions import (
+    AST_CACHE_PATH,
+    IMAGE_CACHE_PATH,
+    MANIFEST_PATH,
+    RENDER_CACHE_PATH,
+    SEARCH_TERMS_PATH,
+    SHARD_DIR,
+    BuildOptions,
+)
+from devserver import watch
+from discovery import build_plan, plan_pages
+from images import build_images, set_image_catalog
+from incremental import build_incremental, save_build_manifest
+from linkcheck import LinkError, check_links, format_broken
+from makesite import is_quiet
+from manifest import load_manifest
+from outputwriter import output_counters
+from parallel import BuildError, configure_process, generate_pages_parallel, resolve_jobs
+from postprocess import compress_outputs, compressible_outputs, format_compress_stats, remove_gzip_siblings
+from profiler import build_stage, disable_profiler, enable_profiler, format_report
+from searchindex import build_search_index, search_index_outputs
+from sharding import ShardError, build_shard, merge_shards, parse_shard
+from siteindex import build_site_index, site_index_outputs
+from template import load_template
 
-def main(base_path):
-    if os.path.exists("docs"):
-        shutil.rmtree("docs")
 
-    copy_directory_contents("static", "docs")
+def main(options):
+    cache, ast_cache = configure_process(options)
+    if options.watch_port is not None:
+        # Watch mode rebuilds incrementally with the same outputs as a normal build.
+        def rebuild():
+            pages, _ = _build(options, incremental=True)
+            _index_pages(pages, options)
+            _update_gzip(options)
+            _prune_caches(cache, ast_cache)
 
-    generate_pages_recursive("content", "template.html", "docs", base_path)
+        watch("content", "static", "template.html", "docs", options.base_path, rebuild, options.watch_port)
+        return
+    profiler = enable_profiler() if options.profile else None
+    try:
+        if options.shard is not None:
+            # A shard only renders its own pages; the merge step does the rest.
+            index, count = options.shard
+            stats = build_shard(
+                "content", "template.html", options.shard_dir, options.base_path, index, count, options.jobs
+            )
+            print(f"Shard {index}/{count}: rendered {stats['pages']} of {stats['total']} pages into {stats['dir']}")
+            return
+        if options.merge_shard_count is not None:
+            # Like a full build, a merge leaves the incremental manifest behind.
+            if os.path.exists(MANIFEST_PATH):
+                os.remove(MANIFEST_PATH)
+            page_dests = [page.dest for page in plan_pages("content", "docs")]
+            pages, removed = merge_shards(
+                options.shard_dir,
+                options.merge_shard_count,
+                "static",
+                "docs",
+                options.base_path,
+                _generated_outputs(page_dests, options),
+            )
+            print(f"Merged {options.merge_shard_count} shards: {len(pages)} pages")
+        else:
+            pages, removed = _build(options, options.incremental)
+        _index_pages(pages, options)
+        _prune_caches(cache, ast_cache)
+        outputs = output_counters()
+        print(f"Output files: {outputs['written']} written, {outputs['unchanged']} unchanged, {removed} removed")
+        if options.minify:
+            saved = outputs["minify_in"] - outputs["minify_out"]
+            print(f"Minified: {outputs['minify_in']:,} -> {outputs['minify_out']:,} bytes ({saved:,} saved)")
+        _update_gzip(options)
+    finally:
+        if profiler is not None:
+            report = profiler.report()
+            if cache is not None:
+                report["render_cache"] = cache.counters()
+            if ast_cache is not None:
+                report["ast_cache"] = ast_cache.counters()
+            print(format_report(report, options.profile))
+            disable_profiler()
+        else:
+            if cache is not None:
+                counters = cache.counters()
+                print(
+                    f"Render cache: {counters['hits']} hits, {counters['disk_hits']} disk hits, "
+                    f"{counters['misses']} misses"
+                )
+            if ast_cache is not None:
+                counters = ast_cache.counters()
+                print(f"AST cache: {counters['hits']} hits, {counters['misses']} misses")
 
 
-if __name__ == "__main__":
-    import sys
+def _update_gzip(options):
+    # Runs after every output is written, so a .gz is only kept while it still
+    # matches the file it compresses.
+    outputs = compressible_outputs("docs", "static")
+    if options.compress:
+        print(format_compress_stats(compress_outputs(outputs, options.jobs)))
+    else:
+        remove_gzip_siblings(outputs)
+
+
+def _prune_caches(cache, ast_cache):
+    # Keeps the caches under .build/ from growing without bound across builds.
+    if cache is not None:
+        cache.prune()
+    if ast_cache is not None:
+        ast_cache.prune()
+
+
+def _index_pages(pages, options):
+    # Everything built from the finished pages' metadata.
+    if options.site_index:
+        template = load_template("template.html", options.base_path)
+        written = build_site_index(
+            pages, "docs", template, options.site_url, options.base_path, options.index_page_size
+        )
+        if not options.quiet:
+            print(f"Site index: wrote {len(written)} files from {len(pages)} pages")
+    if options.search_index:
+        with build_stage("search"):
+            stats = build_search_index(pages, "docs", options.base_path)
+        if not options.quiet:
+            print(
+                f"Search index: {stats['terms']} terms from {stats['pages']} pages "
+                f"in {stats['shards']} shards ({stats['runs']} runs merged)"
+            )
+    if options.link_check is not None:
+        with build_stage("links"):
+            broken = check_links(pages, "docs", options.base_path)
+        if broken and options.link_check == "fail":
+            raise LinkError(broken)
+        checked = sum(len(page.get("urls", {})) for page in pages)
+        print(f"Links: {checked} checked on {len(pages)} pages, {len(broken)} broken")
+        for line in format_broken(broken):
+            print(line)
+
+
+def _generated_outputs(page_dests, options):
+    # Files written after the pages, which the static sync must not treat as orphans.
+    outputs = []
+    if options.site_index:
+        outputs.extend(site_index_outputs(page_dests, "docs", options.site_url, options.index_page_size))
+    if options.search_index:
+        outputs.extend(search_index_outputs("docs"))
+    return outputs
+
 
-    if len(sys.argv) > 1:
-        base_path = sys.argv[1]
+def _build(options, incremental):
+    base_path, jobs = options.base_path, options.jobs
+    image_cache_dir = IMAGE_CACHE_PATH if options.images else None
+    if incremental:
+        stats = build_incremental(
+            "content", "static", "template.html", "docs", base_path, MANIFEST_PATH, jobs, image_cache_dir
+        )
+        print(
+            f"Incremental build: {stats['generated']} generated, {stats['copied']} copied, "
+            f"{stats['skipped']} unchanged, {stats['removed']} removed"
+        )
+        if options.explain:
+            for src_path, reason in stats["reasons"]:
+                print(f"  rebuilt {src_path}: {reason}")
+        return stats["pages"], stats["removed"]
+
+    if options.explain:
+        print("Full build: every page is rebuilt (use --incremental to see why individual pages change)")
+
+    # A full build invalidates whatever the manifest recorded; a new one is
+    # saved once every page has been written.
+    previous = load_manifest(MANIFEST_PATH)
+    if os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+
+    with build_stage("discover"):
+        plan = build_plan("content", "static", "docs")
+
+    # Image variants are written first so the sync below can keep them.
+    variants = []
+    if options.images:
+        with build_stage("images"):
+            catalog, variants = build_images(plan.assets, image_cache_dir, resolve_jobs(jobs))
+        set_image_catalog(catalog)
+        if not is_quiet():
+            print(f"Images: {len(catalog)} sized, {len(variants)} resized variants")
+
+    # Pages about to be generated, image variants and the site and search
+    # indexes are kept; anything else in docs/ that isn't in static/ is an
+    # orphan and gets removed.
+    keep = plan.page_dests() + variants + _generated_outputs(plan.page_dests(), options)
+    stats = sync_directory(
+        "static",
+        "docs",
+        keep=keep,
+        checksum=options.checksum,
+        link=options.link,
+        source_files=plan.asset_stats(),
+    )
+    if not is_quiet():
+        print(
+            f"Static assets: {stats['copied']} copied, {stats['linked'] + stats['reflinked']} linked, "
+            f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+        )
+
+    if options.io_concurrency is not None:
+        pages = generate_pages_async(
+            "content", "template.html", "docs", base_path, jobs, options.io_concurrency, plan
+        )
     else:
-        base_path = "/"
+        pages = generate_pages_parallel("content", "template.html", "docs", base_path, jobs, plan)
+    save_build_manifest(MANIFEST_PATH, previous, plan, "template.html", base_path, pages, variants)
+    return pages, stats["removed"]
 
-    main(base_path)
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    parser.add_argument("base_path", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and assets whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--render-cache-size",
+        type=int,
+        default=4096,
+        help="blocks kept in the in-memory render cache (-1 disables the cache)",
+    )
+    parser.add_argument(
+        "--persist-render-cache",
+        action="store_true",
+        help=f"share rendered blocks across builds and workers via {RENDER_CACHE_PATH}",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild on changes to content/, static/ and template.html and serve docs/ with live reload",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port for the --watch dev server")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print a line per generated page")
+    parser.add_argument(
+        "--profile",
+        choices=["text", "json"],
+        metavar="{text,json}",
+        help="time each build stage and print a summary report in this format (the format is required)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static assets by content hash, not just size and mtime",
+    )
+    parser.add_argument(
+        "--link",
+        choices=["hard", "reflink"],
+        help="hard link or reflink static assets into docs/ instead of copying them",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="read large markdown sources through mmap instead of line by line",
+    )
+    parser.add_argument(
+        "--site-index",
+        action="store_true",
+        help="write paginated blog listings, plus sitemap.xml and feed.xml when --site-url is set",
+    )
+    parser.add_argument("--site-url", help="absolute site origin used in sitemap.xml and feed.xml")
+    parser.add_argument("--index-page-size", type=int, default=10, help="posts per blog listing page")
+    parser.add_argument(
+        "--async-io",
+        type=int,
+        metavar="N",
+        help="overlap page reads and writes with asyncio, N at a time (e.g. 32); full builds only",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace in generated HTML (outside <pre>) and in CSS",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a precompressed .gz next to each HTML, CSS and XML output",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="with --incremental, print which input caused each page to be rebuilt",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add width/height and lazy loading to PNG images and serve resized copies through srcset",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="render only shard I of N (pages split by path hash) into --shard-dir; see --merge-shards",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="combine the outputs of shards 1/N..N/N from --shard-dir into docs/",
+    )
+    parser.add_argument("--shard-dir", default=SHARD_DIR, help="where shard outputs and manifests are kept")
+    parser.add_argument(
+        "--no-ast-cache",
+        action="store_true",
+        help=f"always re-parse markdown instead of reusing parsed pages from {AST_CACHE_PATH}",
+    )
+    parser.add_argument(
+        "--check-links",
+        choices=["warn", "fail"],
+        metavar="{warn,fail}",
+        help="check internal links and images against the built site: 'warn' reports broken ones, "
+        "'fail' also exits non-zero",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="write a full-text search index, sharded by term prefix, into docs/search/",
+    )
+    args = parser.parse_args()
+    shard = None
+    if args.shard is not None:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if (shard is not None or args.merge_shards is not None) and (
+        args.incremental or args.watch or args.images or args.async_io is not None
+    ):
+        parser.error("--shard and --merge-shards can't be combined with --incremental, --watch, --images or --async-io")
+    if shard is not None and args.merge_shards is not None:
+        parser.error("--shard and --merge-shards are separate steps")
+
+    options = BuildOptions(
+        base_path=args.base_path,
+        incremental=args.incremental,
+        jobs=args.jobs,
+        render_cache_size=args.render_cache_size,
+        render_cache_path=RENDER_CACHE_PATH if args.persist_render_cache else None,
+        watch_port=args.port if args.watch else None,
+        quiet=args.quiet,
+        # Watch mode runs until interrupted, so it never prints a report.
+        profile=None if args.watch else args.profile,
+        checksum=args.checksum,
+        link=args.link,
+        use_mmap=args.mmap,
+        site_index=args.site_index or args.site_url is not None,
+        site_url=args.site_url,
+        index_page_size=args.index_page_size,
+        io_concurrency=args.async_io,
+        minify=args.minify,
+        compress=args.gzip,
+        explain=args.explain,
+        images=args.images,
+        shard=shard,
+        merge_shard_count=args.merge_shards,
+        shard_dir=args.shard_dir,
+        ast_cache_path=None if args.no_ast_cache else AST_CACHE_PATH,
+        link_check=args.check_links,
+        search_index=args.search_index,
+        search_terms_path=SEARCH_TERMS_PATH if args.search_index else None,
+    )
+    try:
+        main(options)
+    except (BuildError, ShardError, LinkError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
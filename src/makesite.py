@@ -1,31 +1,26 @@
 import os
-import shutil
 
-from blocks_markdown import markdown_to_html_node
+from astcache import get_ast_cache
+from blocks_markdown import blocks_to_html_node, markdown_to_blocks
+from buildoptions import current_options
+from depgraph import PageRefs, page_dependencies, record_urls
+from discovery import plan_pages
+from htmlnode import HTMLNode, apply_base_path, write_html
+from mmapreader import MappedMarkdown, stream_mapped_page
+from outputwriter import atomic_output, write_output
+from profiler import NULL_TIMINGS, page_timings
+from render_cache import get_render_cache
+from searchindex import TermCollector, get_page_terms_path, record_page_terms
+from siteindex import SummaryCollector, page_metadata
+from streaming import STREAMING_THRESHOLD, stream_page
+from template import load_template
 
+def is_quiet():
+    return current_options().quiet
 
-def copy_directory_contents(source_dir, dest_dir):
-    cwd = os.getcwd()
-    src_dir_path = os.path.join(cwd, source_dir)
-    dest_dir_path = os.path.join(cwd, dest_dir)
 
-    if not os.path.exists(src_dir_path):
-        raise Exception("Folder path not existed!")
-
-    if os.path.exists(dest_dir_path):
-        shutil.rmtree(dest_dir_path)
-
-    os.mkdir(dest_dir_path)
-
-    src_dir = os.listdir(src_dir_path)
-    for item in src_dir:
-        cur_path = os.path.join(src_dir_path, item)
-        if os.path.isfile(cur_path):
-            shutil.copy(cur_path, dest_dir_path)
-        else:
-            new_des_dir_path = os.path.join(dest_dir_path, item)
-            os.mkdir(new_des_dir_path)
-            copy_directory_contents(cur_path, new_des_dir_path)
+def uses_mmap():
+    return current_options().use_mmap
 
 
 def _extract_title(markdown: str) -> str:
@@ -40,48 +35,144 @@ def _extract_title(markdown: str) -> str:
     raise Exception("No h1 title found in markdown")
 
 
-def _generate_page(from_path, template_path, dest_path, base_path=None):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def _page_refs(content_dir):
+    # Title links can only be resolved when the content tree is known.
+    return PageRefs(content_dir) if content_dir is not None else None
+
+
+def _watch_blocks(refs, summary, terms=None):
+    # Search terms see each block before PageRefs fills in link titles, as
+    # record_page_terms sees the page's markdown.
+    def watch(blocks):
+        if terms is not None:
+            blocks = terms.watch(blocks)
+        if refs is not None:
+            blocks = refs.watch(blocks)
+        return summary.watch(blocks)
+
+    return watch
+
+
+def _content_html(root):
+    if isinstance(root, HTMLNode):
+        return "".join(write_html(root, []))
+    return "".join(root)
+
+
+def _parse_markdown(markdown, base_path, refs, timings=NULL_TIMINGS):
+    # Returns (root, title, summary). root is the page's HTMLNode tree, or a
+    # CachedTree straight from the AST cache when this exact source was parsed
+    # before under the same inputs; templates stream either.
+    ast_cache = get_ast_cache()
+    key = None
+    if ast_cache is not None:
+        key = ast_cache.key(markdown, base_path, refs)
+        cached = ast_cache.load(key)
+        if cached is not None:
+            root, title, summary, links, images, urls = cached
+            if refs is not None:
+                refs.links.update(links)
+                refs.images.update(images)
+                if refs.urls is not None and urls is not None:
+                    refs.urls.update(urls)
+            return root, title, summary
+
+    with timings.stage("split"):
+        blocks = markdown_to_blocks(markdown)
+    summary = SummaryCollector()
+    root = blocks_to_html_node(_watch_blocks(refs, summary)(blocks), get_render_cache(), base_path, timings)
+    apply_base_path(root, base_path)
+    title = _extract_title(markdown)
+    if key is not None:
+        ast_cache.store(key, root, title, summary.text, refs)
+    return root, title, summary.text
 
-    with open(from_path, "r") as f:
-        markdown = f.read()
 
-    with open(template_path, "r") as f:
-        template = f.read()
+def _generate_page(from_path, template_path, dest_path, base_path=None, content_dir=None):
+    if not is_quiet():
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
-    root = markdown_to_html_node(markdown)
-    html_content = root.to_html()
-    title = _extract_title(markdown)
+    timings = page_timings(from_path)
+
+    if os.path.getsize(from_path) >= STREAMING_THRESHOLD:
+        # Profiled or not, large pages take the streaming path; its steps are
+        # interleaved, so they are timed together as one "stream" stage.
+        with timings.stage("stream"):
+            return stream_large_page(from_path, template_path, dest_path, base_path, content_dir)
 
-    page = template.replace("{{ Title }}", title)
-    page = page.replace("{{ Content }}", html_content)
+    with timings.stage("read"):
+        with open(from_path, "r") as f:
+            markdown = f.read()
 
-    if base_path is None:
-        base_path = "/"
+    with timings.stage("template"):
+        template = load_template(template_path, base_path)
 
-    page = page.replace('href="/', f'href="{base_path}')
-    page = page.replace('src="/', f'src="{base_path}')
+    refs = _page_refs(content_dir)
+    root, title, summary = _parse_markdown(markdown, base_path, refs, timings)
+    metadata = page_metadata(from_path, dest_path, title, summary)
+    metadata["deps"] = page_dependencies(from_path, template, refs)
+    record_urls(metadata, refs)
+    record_page_terms(metadata, markdown)
 
     dir_path = os.path.dirname(dest_path)
     if dir_path:
         os.makedirs(dir_path, exist_ok=True)
 
-    with open(dest_path, "w") as f:
-        f.write(page)
+    if timings is NULL_TIMINGS:
+        with atomic_output(dest_path) as f:
+            template.stream(f, Title=title, Content=root)
+        return metadata
 
+    # Streaming interleaves serialization with file writes; when profiling,
+    # materialise each step so the stages can be timed separately.
+    with timings.stage("serialize"):
+        html_content = _content_html(root)
+    with timings.stage("template"):
+        page = template.render(Title=title, Content=html_content)
+    with timings.stage("write"):
+        write_output(dest_path, page)
+    return metadata
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path=None):
-    entries = os.listdir(dir_path_content)
 
-    for name in entries:
-        src_path = os.path.join(dir_path_content, name)
-        if not os.path.isfile(src_path):
-            new_dest_dir = os.path.join(dest_dir_path, name)
-            if not os.path.exists(new_dest_dir):
-                os.mkdir(new_dest_dir)
-            generate_pages_recursive(src_path, template_path, new_dest_dir, base_path)
+def render_markdown(markdown, template, base_path=None, content_dir=None):
+    # CPU step (no page I/O beyond reading linked pages' titles) so callers can
+    # schedule reads, rendering and writes independently. Also returns the
+    # PageRefs that recorded what the page referred to.
+    refs = _page_refs(content_dir)
+    root, title, summary = _parse_markdown(markdown, base_path, refs)
+    page = template.render(Title=title, Content=_content_html(root))
+    return page, title, summary, refs
+
+
+def stream_large_page(from_path, template_path, dest_path, base_path=None, content_dir=None):
+    template = load_template(template_path, base_path)
+
+    dir_path = os.path.dirname(dest_path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+
+    use_mmap = uses_mmap()
+    if use_mmap:
+        with MappedMarkdown(from_path) as source:
+            use_mmap = not source.has_carriage_returns()
+
+    summary = SummaryCollector()
+    refs = _page_refs(content_dir)
+    terms = TermCollector() if get_page_terms_path() is not None else None
+    watch_blocks = _watch_blocks(refs, summary, terms)
+    with atomic_output(dest_path) as f:
+        if use_mmap:
+            title = stream_mapped_page(from_path, template, f, get_render_cache(), base_path, watch_blocks)
         else:
-            if name.endswith(".md"):
-                new_name = name.replace(".md", ".html")
-                new_dest_path = os.path.join(dest_dir_path, new_name)
-                _generate_page(src_path, template_path, new_dest_path, base_path)
+            with open(from_path, "r") as src:
+                title = stream_page(src, template, f, get_render_cache(), base_path, watch_blocks)
+    metadata = page_metadata(from_path, dest_path, title, summary.text)
+    metadata["deps"] = page_dependencies(from_path, template, refs)
+    record_urls(metadata, refs)
+    if terms is not None:
+        terms.record(metadata)
+    return metadata
+
+
+def discover_pages(dir_path_content, dest_dir_path):
+    return [(entry.source, entry.dest) for entry in plan_pages(dir_path_content, dest_dir_path)]
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 4
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path, previous=None, stat=None):
+    # Only re-hash when mtime or size moved; otherwise trust the old digest.
+    if stat is None:
+        stat = os.stat(path)
+    if (
+        previous is not None
+        and previous.get("mtime") == stat.st_mtime_ns
+        and previous.get("size") == stat.st_size
+    ):
+        return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": previous["hash"]}
+    return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": hash_file(path)}
+
+
+def empty_manifest():
+    return {
+        "version": MANIFEST_VERSION,
+        "base_path": None,
+        "minify": False,
+        "files": {},
+        "pages": {},
+        "assets": {},
+        "variants": [],
+    }
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return empty_manifest()
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(path, manifest):
+    dir_path = os.path.dirname(path)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
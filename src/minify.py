@@ -0,0 +1,104 @@
+import re
+
+# Whitespace is significant inside these elements, so they're copied verbatim.
+PRESERVE_RE = re.compile(r"(<(pre|textarea|script)\b.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+PRESERVE_OPEN_RE = re.compile(r"<(pre|textarea|script)\b", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+""", re.DOTALL)
+CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+# Only trailing space goes after a colon: "div :first-child" is a selector.
+CSS_COLON_RE = re.compile(r":\s+")
+
+
+def _collapse(html):
+    parts = []
+    pos = 0
+    for match in PRESERVE_RE.finditer(html):
+        parts.append(WHITESPACE_RE.sub(" ", html[pos:match.start()]))
+        parts.append(match.group(1))
+        pos = match.end()
+    parts.append(WHITESPACE_RE.sub(" ", html[pos:]))
+    return "".join(parts)
+
+
+def minify_html(html):
+    return _collapse(html).strip()
+
+
+class HtmlMinifier:
+    # Minifies HTML written to it a piece at a time into sink, with the same
+    # result as minify_html on the whole text. Only trailing whitespace, an
+    # unfinished tag and an unclosed pre/textarea/script are held back.
+    def __init__(self, sink):
+        self.sink = sink
+        self.buffer = ""
+        self.started = False
+        # UTF-8 bytes written in, before minifying.
+        self.original = 0
+
+    def write(self, text):
+        self.original += len(text.encode("utf-8"))
+        self.buffer += text
+        self._flush(final=False)
+
+    def close(self):
+        self._flush(final=True)
+
+    def _emit(self, text):
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        if text:
+            self.sink.write(text)
+
+    def _flush(self, final):
+        buffer = self.buffer
+        while True:
+            match = PRESERVE_RE.search(buffer)
+            opening = PRESERVE_OPEN_RE.search(buffer)
+            # An earlier element that isn't closed yet may still swallow this one.
+            if match is None or opening.start() != match.start():
+                break
+            self._emit(WHITESPACE_RE.sub(" ", buffer[:match.start()]) + match.group(1))
+            buffer = buffer[match.end():]
+        if final:
+            self._emit(_collapse(buffer).rstrip())
+            buffer = ""
+        else:
+            if opening is not None:
+                cut = opening.start()
+            else:
+                cut = len(buffer.rstrip())
+                tag = buffer.rfind("<", 0, cut)
+                if tag > buffer.rfind(">", 0, cut):
+                    cut = tag
+            self._emit(WHITESPACE_RE.sub(" ", buffer[:cut]))
+            buffer = buffer[cut:]
+        self.buffer = buffer
+
+
+def _minify_css_code(code):
+    code = CSS_PUNCTUATION_RE.sub(r"\1", code)
+    code = CSS_COLON_RE.sub(":", code)
+    return code.replace(";}", "}")
+
+
+def minify_css(css):
+    # Strings are kept as-is; comments go; whitespace collapses and is dropped
+    # next to punctuation.
+    out = []
+    code = []
+    pos = 0
+    for match in CSS_TOKEN_RE.finditer(css):
+        code.append(css[pos:match.start()])
+        pos = match.end()
+        if match.group(1) is not None:
+            out.append(_minify_css_code("".join(code)))
+            out.append(match.group(1))
+            code = []
+        elif not match.group(0).startswith("/*"):
+            code.append(" ")
+    code.append(css[pos:])
+    out.append(_minify_css_code("".join(code)))
+    return "".join(out).strip()
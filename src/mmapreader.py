@@ -0,0 +1,65 @@
+import mmap
+import re
+
+from streaming import render_blocks
+
+# ASCII-only stand-in for str.lstrip(): finds "# " at the start of a line,
+# after optional leading blanks.
+TITLE_RE = re.compile(rb"^[ \t\f\v]*# ([^\n]*)", re.MULTILINE)
+
+
+class MappedMarkdown:
+    # Scans a memory-mapped source for block boundaries and the h1 title as
+    # bytes, decoding only the slice for each block as it is rendered.
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+
+    def __enter__(self):
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            self._map = b""
+        return self
+
+    def __exit__(self, *exc_info):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def has_carriage_returns(self):
+        # Text mode would translate these; the byte scanner doesn't.
+        return self._map.find(b"\r") != -1
+
+    def title(self):
+        match = TITLE_RE.search(self._map)
+        if match is None:
+            return None
+        return match.group(1).decode("utf-8").strip()
+
+    def blocks(self):
+        buffer = self._map
+        pos = 0
+        while True:
+            end = buffer.find(b"\n\n", pos)
+            chunk = buffer[pos:] if end == -1 else buffer[pos:end]
+            # "\n\n" never splits a UTF-8 sequence, so each slice decodes alone.
+            text = chunk.decode("utf-8").strip()
+            if text:
+                yield text
+            if end == -1:
+                return
+            pos = end + 2
+
+
+def stream_mapped_page(path, template, sink, cache=None, base_path=None, watch_blocks=None):
+    with MappedMarkdown(path) as source:
+        title = source.title()
+        if title is None:
+            raise Exception("No h1 title found in markdown")
+        blocks = source.blocks() if watch_blocks is None else watch_blocks(source.blocks())
+        template.stream(sink, Title=title, Content=render_blocks(blocks, cache, base_path))
+    return title
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+from buildoptions import current_options
+from manifest import hash_file
+from minify import HtmlMinifier, minify_html
+
+# minify_in and minify_out are the bytes of minified outputs before and after.
+_counters = {"written": 0, "unchanged": 0, "minify_in": 0, "minify_out": 0}
+_lock = threading.Lock()
+
+
+def minifies():
+    # Minified HTML is what gets compared with the file on disk, so an
+    # unchanged page is still recognised as unchanged.
+    return current_options().minify
+
+
+def output_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def add_output_counters(counters):
+    with _lock:
+        for name, value in counters.items():
+            _counters[name] += value
+
+
+def reset_output_counters():
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def count_minified(original, minified):
+    with _lock:
+        _counters["minify_in"] += original
+        _counters["minify_out"] += minified
+
+
+def _matches(path, size, digest):
+    # Sizes are compared first so most changed files never get hashed.
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return stat.st_size == size and hash_file(path) == digest()
+
+
+def _discard(tmp_path):
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+def write_output(path, text):
+    # Leaves path (and its mtime) alone when it already holds these bytes;
+    # otherwise swaps the new content in so readers never see a partial file.
+    # Replacing (rather than writing through) also leaves the source of a
+    # hard-linked output untouched. text may be str or bytes.
+    if minifies() and isinstance(text, str) and path.endswith(".html"):
+        original = len(text.encode("utf-8"))
+        text = minify_html(text)
+        data = text.encode("utf-8")
+        count_minified(original, len(data))
+    else:
+        data = text if isinstance(text, bytes) else text.encode("utf-8")
+    if _matches(path, len(data), lambda: hashlib.sha256(data).hexdigest()):
+        _count("unchanged")
+        return False
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    _count("written")
+    return True
+
+
+@contextmanager
+def atomic_output(path):
+    # Streaming counterpart of write_output: the caller writes to a temporary
+    # file which only replaces path if the build succeeds and the bytes differ.
+    # Pages are minified on their way to the file, never read back whole.
+    tmp_path = path + ".tmp"
+    minifier = None
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if minifies() and path.endswith(".html"):
+                minifier = HtmlMinifier(f)
+                yield minifier
+                minifier.close()
+            else:
+                yield f
+        size = os.path.getsize(tmp_path)
+        if minifier is not None:
+            count_minified(minifier.original, size)
+        if _matches(path, size, lambda: hash_file(tmp_path)):
+            os.remove(tmp_path)
+            _count("unchanged")
+        else:
+            os.replace(tmp_path, path)
+            _count("written")
+    except BaseException:
+        _discard(tmp_path)
+        raise
@@ -0,0 +1,138 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from astcache import configure_ast_cache, get_ast_cache
+from buildoptions import current_options, set_build_options
+from images import get_image_catalog, set_image_catalog
+from makesite import _generate_page, discover_pages
+from outputwriter import add_output_counters, output_counters
+from profiler import build_stage, disable_profiler, enable_profiler, get_profiler
+from render_cache import configure_render_cache, get_render_cache
+
+
+class BuildError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        for src_path, message in failures:
+            lines.append(f"  {src_path}: {message}")
+        super().__init__("\n".join(lines))
+
+
+def configure_process(options):
+    # Puts options in effect in this process and opens the caches they ask
+    # for. Returns (render cache, AST cache); either may be None.
+    set_build_options(options)
+    size = options.render_cache_size
+    if size is not None and size < 0:
+        size = None
+    return configure_render_cache(size, options.render_cache_path), configure_ast_cache(options.ast_cache_path)
+
+
+def worker_settings():
+    # The build's options, plus the image catalog it has worked out since,
+    # go to each worker once, when the pool starts.
+    return current_options(), get_image_catalog()
+
+
+def init_worker(options, image_catalog):
+    configure_process(options)
+    set_image_catalog(image_catalog)
+    if options.profile is not None:
+        enable_profiler()
+    else:
+        disable_profiler()
+
+
+def _render_job(job):
+    src_path, dest_path, template_path, base_path, content_dir = job
+    try:
+        metadata = _generate_page(src_path, template_path, dest_path, base_path, content_dir)
+    except Exception as e:
+        return src_path, f"{e.__class__.__name__}: {e}", None
+    return src_path, None, metadata
+
+
+def counter_snapshot():
+    # Everything a worker counts that the parent reports build-wide totals for.
+    snapshot = {"outputs": output_counters()}
+    for name, cache in (("render", get_render_cache()), ("ast", get_ast_cache())):
+        if cache is not None:
+            snapshot[name] = cache.counters()
+    return snapshot
+
+
+def counter_delta(before, after):
+    return {
+        source: {name: counters[name] - before[source][name] for name in counters}
+        for source, counters in after.items()
+    }
+
+
+def add_counters(delta):
+    add_output_counters(delta["outputs"])
+    for name, cache in (("render", get_render_cache()), ("ast", get_ast_cache())):
+        if cache is not None and name in delta:
+            cache.add_counters(delta[name])
+
+
+def _render_job_in_worker(job):
+    # Workers hand back their counters and stage timings for the page so the
+    # parent can report totals for the whole build.
+    before = counter_snapshot()
+    src_path, message, metadata = _render_job(job)
+    counters = counter_delta(before, counter_snapshot())
+
+    timings = None
+    profiler = get_profiler()
+    if profiler is not None:
+        timings = [(page.path, dict(page.stages)) for page in profiler.take_pages()]
+
+    return src_path, message, metadata, counters, timings
+
+
+def resolve_jobs(jobs):
+    if jobs is None or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def render_pages(pairs, template_path, base_path=None, jobs=1, content_dir=None):
+    work = [(src_path, dest_path, template_path, base_path, content_dir) for src_path, dest_path in pairs]
+    jobs = min(resolve_jobs(jobs), max(len(work), 1))
+
+    if jobs == 1:
+        results = [_render_job(job) for job in work]
+    else:
+        # map() yields in submission order, so failures are reported in walk order
+        # no matter which worker finishes first.
+        chunksize = max(1, len(work) // (jobs * 4))
+        profiler = get_profiler()
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker, initargs=worker_settings()
+        ) as pool:
+            results = []
+            for src_path, message, metadata, counters, timings in pool.map(
+                _render_job_in_worker, work, chunksize=chunksize
+            ):
+                add_counters(counters)
+                if profiler is not None and timings is not None:
+                    for path, stages in timings:
+                        profiler.add_page(path, stages)
+                results.append((src_path, message, metadata))
+
+    failures = [(src_path, message) for src_path, message, _ in results if message is not None]
+    pages = [metadata for _, _, metadata in results if metadata is not None]
+    return failures, pages
+
+
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path, base_path=None, jobs=None, plan=None):
+    if plan is None:
+        with build_stage("discover"):
+            pairs = discover_pages(dir_path_content, dest_dir_path)
+    else:
+        pairs = plan.page_pairs()
+    failures, pages = render_pages(pairs, template_path, base_path, jobs, dir_path_content)
+    if failures:
+        raise BuildError(failures)
+    return pages
@@ -0,0 +1,65 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from assetsync import is_current_gzip, stamp_gzip
+from discovery import scan_tree
+from outputwriter import write_output
+from parallel import resolve_jobs
+
+COMPRESSIBLE = (".html", ".css", ".xml", ".js", ".svg", ".txt")
+
+
+def compressible_outputs(dest_dir, source_dir):
+    # Outputs that get a .gz sibling. Ones whose .gz comes from source_dir
+    # (static/) as an asset of its own are left alone.
+    return [
+        os.path.join(dest_dir, rel_dir, name)
+        for rel_dir, name, _ in scan_tree(dest_dir)
+        if name.endswith(COMPRESSIBLE) and not os.path.exists(os.path.join(source_dir, rel_dir, name + ".gz"))
+    ]
+
+
+def remove_gzip_siblings(paths):
+    # Without --gzip, .gz files left by an earlier build would go stale.
+    removed = 0
+    for path in paths:
+        if os.path.exists(path + ".gz"):
+            os.remove(path + ".gz")
+            removed += 1
+    return removed
+
+
+def _compress_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps the .gz bytes reproducible between builds.
+    packed = gzip.compress(data, compresslevel=9, mtime=0)
+    write_output(path + ".gz", packed)
+    stamp_gzip(path)
+    return path, len(data), len(packed)
+
+
+def compress_outputs(paths, jobs=1):
+    # Run once every output is written: an up-to-date .gz means the output
+    # hasn't changed since it was compressed.
+    work = [path for path in paths if not is_current_gzip(path)]
+    jobs = min(resolve_jobs(jobs), max(len(work), 1))
+    if jobs == 1:
+        results = [_compress_file(path) for path in work]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_compress_file, work, chunksize=max(1, len(work) // (jobs * 4))))
+
+    stats = {"files": len(results), "original": 0, "compressed": 0}
+    for _, original, compressed in results:
+        stats["original"] += original
+        stats["compressed"] += compressed
+    return stats
+
+
+def format_compress_stats(stats):
+    return (
+        f"Compressed {stats['files']} files: {stats['original']:,} -> {stats['compressed']:,} bytes "
+        f"in .gz siblings"
+    )
@@ -0,0 +1,151 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+STAGES = ("discover", "read", "split", "classify", "inline", "serialize", "template", "write")
+
+_profiler = None
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("stages", "name", "start")
+
+    def __init__(self, stages, name):
+        self.stages = stages
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stages[self.name] += time.perf_counter() - self.start
+
+
+class PageTimings:
+    __slots__ = ("path", "stages")
+
+    def __init__(self, path):
+        self.path = path
+        self.stages = defaultdict(float)
+
+    def stage(self, name):
+        return _Stage(self.stages, name)
+
+    def total(self):
+        return sum(self.stages.values())
+
+
+class _NullTimings:
+    __slots__ = ()
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+
+# Shared stand-in used when profiling is off, so call sites never branch.
+NULL_TIMINGS = _NullTimings()
+
+
+class BuildProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.build_stages = defaultdict(float)
+        self.pages = []
+
+    def stage(self, name):
+        return _Stage(self.build_stages, name)
+
+    def start_page(self, path):
+        timings = PageTimings(path)
+        self.pages.append(timings)
+        return timings
+
+    def add_page(self, path, stages):
+        timings = PageTimings(path)
+        timings.stages.update(stages)
+        self.pages.append(timings)
+
+    def take_pages(self):
+        pages, self.pages = self.pages, []
+        return pages
+
+    def report(self, top=10):
+        elapsed = time.perf_counter() - self.started
+        totals = dict.fromkeys(STAGES, 0.0)
+        totals.update(self.build_stages)
+        for page in self.pages:
+            for name, seconds in page.stages.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        slowest = sorted(self.pages, key=lambda page: page.total(), reverse=True)[:top]
+        return {
+            "pages": len(self.pages),
+            "elapsed": elapsed,
+            "pages_per_sec": len(self.pages) / elapsed if elapsed > 0 else 0.0,
+            "stages": totals,
+            "slowest": [
+                {"path": page.path, "total": page.total(), "stages": dict(page.stages)}
+                for page in slowest
+            ],
+        }
+
+
+def format_report(report, output_format="text"):
+    if output_format == "json":
+        return json.dumps(report, indent=2)
+
+    lines = [
+        f"Built {report['pages']} pages in {report['elapsed']:.3f}s "
+        f"({report['pages_per_sec']:.1f} pages/sec)",
+        "",
+        "Time per stage (summed over pages and workers):",
+    ]
+    total = sum(report["stages"].values()) or 1.0
+    for name, seconds in report["stages"].items():
+        lines.append(f"  {name:<10} {seconds * 1000:10.2f}ms {seconds / total:6.1%}")
+    if report["stages"].get("stream"):
+        lines.append("  (stream: pages too large to hold in memory, read, parsed and written in one pass)")
+    if "render_cache" in report:
+        counters = report["render_cache"]
+        lines.append("")
+        lines.append(
+            f"Render cache: {counters['hits']} hits, {counters['disk_hits']} disk hits, "
+            f"{counters['misses']} misses"
+        )
+    if "ast_cache" in report:
+        counters = report["ast_cache"]
+        lines.append(f"AST cache: {counters['hits']} hits, {counters['misses']} misses")
+    if report["slowest"]:
+        lines.append("")
+        lines.append("Slowest pages:")
+        for page in report["slowest"]:
+            lines.append(f"  {page['total'] * 1000:10.2f}ms  {page['path']}")
+    return "\n".join(lines)
+
+
+def enable_profiler():
+    global _profiler
+    _profiler = BuildProfiler()
+    return _profiler
+
+
+def disable_profiler():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler():
+    return _profiler
+
+
+def page_timings(path):
+    if _profiler is None:
+        return NULL_TIMINGS
+    return _profiler.start_page(path)
+
+
+def build_stage(name):
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(name)
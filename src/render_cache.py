@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from blocks_markdown import block_to_html_node
+from htmlnode import apply_base_path
+from images import image_catalog_key
+from profiler import NULL_TIMINGS
+
+# Bump whenever block rendering changes so persisted fragments are not reused.
+RENDER_VERSION = 2
+# Fragments are dropped from the on-disk cache, least recently used first,
+# once their HTML outgrows this.
+MAX_DISK_BYTES = 256 << 20
+
+_cache = None
+
+
+class RenderCache:
+    def __init__(self, maxsize=4096, path=None, max_disk_bytes=MAX_DISK_BYTES):
+        self.maxsize = maxsize
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._db = None
+
+    def _connect(self):
+        # Opened lazily so each worker process gets its own connection.
+        if self._db is None and self.path is not None:
+            dir_path = os.path.dirname(self.path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # "used" is when a fragment was last read or written, for prune().
+            # The older "blocks" table had no such column.
+            self._db.execute("DROP TABLE IF EXISTS blocks")
+            self._db.execute("CREATE TABLE IF NOT EXISTS fragments (key TEXT PRIMARY KEY, html TEXT, used REAL)")
+        return self._db
+
+    @staticmethod
+    def key(block, base_path=None):
+        # Image tags carry the catalog's sizes, so blocks with images are also
+        # keyed on the catalog they were rendered against.
+        images = image_catalog_key() if "![" in block else ""
+        data = f"{RENDER_VERSION}\0{base_path or '/'}\0{images}\0{block}".encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def render(self, block, base_path=None, timings=NULL_TIMINGS):
+        key = self.key(block, base_path)
+
+        html = self._entries.get(key)
+        if html is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+        db = self._connect()
+        if db is not None:
+            row = db.execute("SELECT html FROM fragments WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE fragments SET used = ? WHERE key = ?", (time.time(), key))
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+
+        self.misses += 1
+        root = apply_base_path(block_to_html_node(block, timings), base_path)
+        with timings.stage("serialize"):
+            html = root.to_html()
+        if db is not None:
+            db.execute("INSERT OR REPLACE INTO fragments (key, html, used) VALUES (?, ?, ?)", (key, html, time.time()))
+        self._remember(key, html)
+        return html
+
+    def _remember(self, key, html):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = html
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def prune(self):
+        # Returns how many fragments were removed from disk to get their HTML
+        # under max_disk_bytes. Freed pages are reused by later inserts.
+        db = self._connect()
+        if db is None:
+            return 0
+        cursor = db.execute(
+            "DELETE FROM fragments WHERE key IN (SELECT key FROM (SELECT key, "
+            "SUM(LENGTH(CAST(html AS BLOB))) OVER (ORDER BY used DESC, key) AS total FROM fragments) WHERE total > ?)",
+            (self.max_disk_bytes,),
+        )
+        return cursor.rowcount
+
+    def counters(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def add_counters(self, counters):
+        self.hits += counters["hits"]
+        self.disk_hits += counters["disk_hits"]
+        self.misses += counters["misses"]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.maxsize}, {self.path}, {self.counters()})"
+
+
+def configure_render_cache(maxsize=4096, path=None):
+    global _cache
+    _cache = RenderCache(maxsize, path) if maxsize is not None else None
+    return _cache
+
+
+def get_render_cache():
+    return _cache
@@ -0,0 +1,248 @@
+import hashlib
+import heapq
+import json
+import os
+import re
+import tempfile
+
+from blocks_markdown import BlockType, classify_block, handle_clean_line, markdown_to_blocks
+from buildoptions import current_options
+from discovery import scan_tree
+from inline_markdown import text_to_textnodes
+from outputwriter import write_output
+from siteindex import page_url
+from streaming import BlockReader
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_DIR = "search"
+# Each shard holds every term starting with the same PREFIX_LENGTH characters.
+PREFIX_LENGTH = 2
+# Postings buffered in memory before a sorted run is spilled to disk.
+RUN_SIZE = 50000
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+# Layout under <dest_dir>/search/:
+#   pages.json  {"version", "prefix_length", "shards": [names],
+#                "pages": [[url, title, summary], ...]}; a page's id is its index
+#   <name>.json {term: [[page id, first position, gap, gap, ...], ...]}
+# Terms are casefolded words; positions count words from the top of the page.
+# A shard's name is the term's prefix, or "_" plus the prefix's UTF-8 bytes in
+# hex when the prefix isn't plain ASCII letters and digits.
+
+
+def get_page_terms_path():
+    # Where pages' postings are kept between builds, keyed by a hash of their
+    # markdown, so the index is built without parsing unchanged pages again.
+    # None means recording is off.
+    return current_options().search_terms_path
+
+
+def _terms_path(key):
+    return os.path.join(get_page_terms_path(), key[:2], key + ".json")
+
+
+def _store_page_terms(key, postings):
+    path = _terms_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(postings, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def record_page_terms(metadata, markdown):
+    # Called while a page is rendered: stores its postings unless this exact
+    # markdown was indexed before, and notes their key in the page metadata.
+    if get_page_terms_path() is None:
+        return
+    digest = hashlib.sha256(f"{SEARCH_INDEX_VERSION}\0".encode("utf-8"))
+    digest.update(markdown.encode("utf-8"))
+    key = digest.hexdigest()
+    if not os.path.exists(_terms_path(key)):
+        _store_page_terms(key, page_postings(markdown))
+    metadata["search"] = key
+
+
+class TermCollector:
+    # Counts a page's postings block by block as the streaming renderer reads
+    # it, so large pages are indexed without going over their source again.
+    def __init__(self):
+        self.postings = {}
+        self.position = 0
+        # Keyed by the blocks rather than the raw markdown, which a streamed
+        # page never holds whole.
+        self.digest = hashlib.sha256(f"{SEARCH_INDEX_VERSION}\0blocks\0".encode("utf-8"))
+
+    def watch(self, blocks):
+        for block in blocks:
+            self.digest.update(block.encode("utf-8"))
+            self.digest.update(b"\0")
+            for text in block_text(block):
+                for match in WORD_RE.finditer(text):
+                    self.postings.setdefault(match.group().casefold(), []).append(self.position)
+                    self.position += 1
+            yield block
+
+    def record(self, metadata):
+        key = self.digest.hexdigest()
+        if not os.path.exists(_terms_path(key)):
+            _store_page_terms(key, self.postings)
+        metadata["search"] = key
+
+
+def _load_page_terms(page):
+    # Pages whose recorded postings are missing are read again here, block by
+    # block so large sources aren't held in memory.
+    key = page.get("search")
+    if key is not None and get_page_terms_path() is not None:
+        try:
+            with open(_terms_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    terms = TermCollector()
+    with open(page["source"], "r") as f:
+        for _ in terms.watch(BlockReader(f)):
+            pass
+    return terms.postings
+
+
+def _prune_page_terms(keep):
+    terms_dir = get_page_terms_path()
+    for rel_dir, name, _ in scan_tree(terms_dir):
+        if name.endswith(".json") and name[: -len(".json")] not in keep:
+            os.remove(os.path.join(terms_dir, rel_dir, name))
+
+
+def search_index_outputs(dest_dir):
+    # The files the last search index build wrote, per its pages.json.
+    out_dir = os.path.join(dest_dir, SEARCH_DIR)
+    try:
+        with open(os.path.join(out_dir, "pages.json"), "r") as f:
+            shards = json.load(f).get("shards", [])
+    except (OSError, ValueError, AttributeError):
+        return []
+    return [os.path.join(out_dir, "pages.json")] + [os.path.join(out_dir, f"{name}.json") for name in shards]
+
+
+def shard_name(term):
+    prefix = term[:PREFIX_LENGTH]
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode("utf-8").hex()
+
+
+def block_text(block):
+    # One block's visible text, read the way the renderer reads it: markup and
+    # URLs left out, link text and image alt text kept.
+    block_type, items = classify_block(block)
+    if block_type == BlockType.CODE:
+        yield handle_clean_line(block_type, block)
+        return
+    for text in items if items is not None else [handle_clean_line(block_type, block)]:
+        try:
+            yield "".join(node.text for node in text_to_textnodes(text))
+        except Exception:
+            yield text
+
+
+def page_postings(markdown):
+    # {term: [positions]} for one page.
+    terms = TermCollector()
+    for _ in terms.watch(markdown_to_blocks(markdown)):
+        pass
+    return terms.postings
+
+
+def _spill(buffer, run_dir, runs):
+    # A term occurs once per page, so (term, page id) orders the run fully.
+    buffer.sort()
+    path = os.path.join(run_dir, f"run-{len(runs)}.jsonl")
+    with open(path, "w") as f:
+        for posting in buffer:
+            f.write(json.dumps(posting, separators=(",", ":")) + "\n")
+    runs.append(path)
+    buffer.clear()
+
+
+def _read_run(path):
+    with open(path, "r") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _encode(page_id, positions):
+    return [page_id, positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+
+
+def _write_shard(out_dir, name, terms):
+    path = os.path.join(out_dir, f"{name}.json")
+    write_output(path, json.dumps(terms, separators=(",", ":"), ensure_ascii=False))
+    return path
+
+
+def build_search_index(pages, dest_dir, base_path=None, run_size=RUN_SIZE):
+    # Streams every page's postings into sorted runs of at most run_size,
+    # then merges the runs term by term. Terms come out of the merge in
+    # order, so each shard is complete before the next begins and only one
+    # shard is ever held in memory. Returns counts for the build summary.
+    root = (base_path or "/").rstrip("/")
+    out_dir = os.path.join(dest_dir, SEARCH_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    previous = search_index_outputs(dest_dir)
+
+    pages = sorted(pages, key=lambda page: page_url(page["dest"], dest_dir))
+    table = []
+    runs = []
+    terms_seen = 0
+    shards = []
+    written = set()
+    with tempfile.TemporaryDirectory() as run_dir:
+        buffer = []
+        for page_id, page in enumerate(pages):
+            table.append([root + page_url(page["dest"], dest_dir), page["title"], page.get("summary", "")])
+            postings = _load_page_terms(page)
+            for term, positions in postings.items():
+                buffer.append((term, page_id, positions))
+            if len(buffer) >= run_size:
+                _spill(buffer, run_dir, runs)
+        if buffer:
+            _spill(buffer, run_dir, runs)
+
+        name = None
+        terms = {}
+        merged = heapq.merge(*(_read_run(path) for path in runs), key=lambda posting: posting[:2])
+        for term, page_id, positions in merged:
+            if term not in terms:
+                terms_seen += 1
+                if shard_name(term) != name:
+                    if terms:
+                        written.add(_write_shard(out_dir, name, terms))
+                        shards.append(name)
+                    name = shard_name(term)
+                    terms = {}
+                terms[term] = []
+            terms[term].append(_encode(page_id, positions))
+        if terms:
+            written.add(_write_shard(out_dir, name, terms))
+            shards.append(name)
+
+    meta = {
+        "version": SEARCH_INDEX_VERSION,
+        "prefix_length": PREFIX_LENGTH,
+        "shards": shards,
+        "pages": table,
+    }
+    pages_path = os.path.join(out_dir, "pages.json")
+    write_output(pages_path, json.dumps(meta, separators=(",", ":"), ensure_ascii=False))
+    written.add(pages_path)
+
+    # Shards the last build wrote for prefixes no page uses any more. Other
+    # files in the directory (say, synced from static/search/) aren't ours.
+    for path in previous:
+        if path not in written and os.path.exists(path):
+            os.remove(path)
+    if get_page_terms_path() is not None:
+        _prune_page_terms({page["search"] for page in pages if "search" in page})
+    return {"pages": len(table), "terms": terms_seen, "shards": len(shards), "runs": len(runs)}
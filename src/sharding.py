@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+
+from assetsync import sync_directory
+from discovery import plan_assets, plan_pages
+from outputwriter import write_output
+from parallel import BuildError, render_pages
+from profiler import build_stage
+
+SHARD_MANIFEST_VERSION = 1
+
+
+class ShardError(Exception):
+    pass
+
+
+def parse_shard(text):
+    # "2/4" -> (2, 4); shards are numbered from 1.
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {text!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and N, got {text!r}")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    # Stable across machines and Python runs (unlike hash()), and independent
+    # of the order pages were discovered in.
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_path(shard_dir, index, count):
+    return os.path.join(shard_dir, f"{index}-of-{count}")
+
+
+def _plan_digest(pages, content_dir):
+    # Every shard records which content tree it partitioned, so the merge can
+    # refuse to combine shards built from different checkouts.
+    digest = hashlib.sha256()
+    for page in pages:
+        digest.update(os.path.relpath(page.source, content_dir).replace(os.sep, "/").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_shard(content_dir, template_path, shard_dir, base_path, index, count, jobs=1):
+    # Renders this shard's pages into <shard_dir>/<i>-of-<N>/pages and writes
+    # the shard manifest next to them. Static assets are left to the merge.
+    root = shard_path(shard_dir, index, count)
+    pages_dir = os.path.join(root, "pages")
+    if os.path.exists(root):
+        shutil.rmtree(root)
+
+    with build_stage("discover"):
+        pages = plan_pages(content_dir, pages_dir)
+    mine = [
+        (page.source, page.dest)
+        for page in pages
+        if shard_of(os.path.relpath(page.source, content_dir), count) == index
+    ]
+
+    failures, rendered = render_pages(mine, template_path, base_path, jobs, content_dir)
+    if failures:
+        raise BuildError(failures)
+
+    manifest = {
+        "version": SHARD_MANIFEST_VERSION,
+        "shard": [index, count],
+        "base_path": base_path,
+        "plan": _plan_digest(pages, content_dir),
+        "pages": {},
+    }
+    for metadata in rendered:
+        rel_dest = os.path.relpath(metadata["dest"], pages_dir)
+        manifest["pages"][metadata["source"]] = {"dest": rel_dest, "meta": metadata}
+    with open(os.path.join(root, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return {"pages": len(mine), "total": len(pages), "dir": root}
+
+
+def _load_shards(shard_dir, count):
+    manifests = []
+    missing = []
+    for index in range(1, count + 1):
+        path = os.path.join(shard_path(shard_dir, index, count), "manifest.json")
+        try:
+            with open(path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            missing.append(f"{index}/{count}")
+            continue
+        if manifest.get("version") != SHARD_MANIFEST_VERSION or manifest.get("shard") != [index, count]:
+            missing.append(f"{index}/{count}")
+            continue
+        manifests.append(manifest)
+    if missing:
+        raise ShardError(f"Missing or unreadable shard manifests: {', '.join(missing)}")
+
+    for key, what in (("base_path", "base paths"), ("plan", "content trees")):
+        values = {manifest[key] for manifest in manifests}
+        if len(values) > 1:
+            raise ShardError(f"Shards were built with different {what}")
+    return manifests
+
+
+def merge_shards(shard_dir, count, static_dir, dest_dir, base_path=None, keep=()):
+    # Combines every shard's pages into dest_dir, then syncs static assets
+    # around them, leaving the pages and any paths in keep in place.
+    # Returns (pages metadata, number of files removed).
+    manifests = _load_shards(shard_dir, count)
+    if base_path is not None and manifests[0]["base_path"] != base_path:
+        raise ShardError(f"Shards were built for base path {manifests[0]['base_path']}, not {base_path}")
+
+    owners = {}
+    sources = {}
+    collisions = []
+    for manifest in manifests:
+        index = manifest["shard"][0]
+        for src_path, entry in manifest["pages"].items():
+            rel_dest = os.path.normpath(entry["dest"])
+            if src_path in sources:
+                collisions.append(f"{src_path} was rendered by shards {sources[src_path]} and {index}")
+            sources[src_path] = index
+            if rel_dest in owners:
+                collisions.append(f"{rel_dest} is written by {owners[rel_dest][1]} and {src_path}")
+            owners[rel_dest] = (index, src_path)
+
+    assets = {os.path.normpath(entry.rel_path) for entry in plan_assets(static_dir, dest_dir)}
+    collisions.extend(f"{rel_dest} is both a page and a static asset" for rel_dest in sorted(owners.keys() & assets))
+    if collisions:
+        raise ShardError("Shard outputs collide:\n  " + "\n  ".join(collisions))
+
+    pages = []
+    for rel_dest, (index, src_path) in sorted(owners.items()):
+        shard_file = os.path.join(shard_path(shard_dir, index, count), "pages", rel_dest)
+        dest_path = os.path.join(dest_dir, rel_dest)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(shard_file, "r", encoding="utf-8") as f:
+            write_output(dest_path, f.read())
+        metadata = dict(manifests[index - 1]["pages"][src_path]["meta"])
+        metadata["dest"] = os.path.normpath(dest_path)
+        pages.append(metadata)
+
+    stats = sync_directory(static_dir, dest_dir, keep=[page["dest"] for page in pages] + list(keep))
+    return pages, stats["removed"]
@@ -0,0 +1,178 @@
+import html
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from blocks_markdown import BlockType, classify_block
+from htmlnode import LeafNode, ParentNode, apply_base_path
+from inline_markdown import text_to_textnodes
+from outputwriter import atomic_output, write_output
+from textnode import TextType
+
+FEED_SIZE = 20
+
+
+class SummaryCollector:
+    # Passes blocks through unchanged while remembering the first paragraph,
+    # so page metadata comes out of the render walk instead of a second parse.
+    def __init__(self):
+        self.text = None
+
+    def watch(self, blocks):
+        for block in blocks:
+            if self.text is None and classify_block(block)[0] == BlockType.PARAGRAPH:
+                self.text = _plain_text(block)
+            yield block
+
+
+def _plain_text(block):
+    # Paragraphs made only of links or images (e.g. "[< Back Home](/)") are
+    # navigation, not prose, and are skipped by returning None.
+    try:
+        nodes = text_to_textnodes(block.replace("\n", " "))
+    except Exception:
+        return block.replace("\n", " ")
+    prose = [node for node in nodes if node.text_type not in (TextType.LINK, TextType.IMAGE)]
+    if not any(node.text.strip() for node in prose):
+        return None
+    return "".join(node.text for node in nodes if node.text_type != TextType.IMAGE)
+
+
+def page_metadata(src_path, dest_path, title, summary):
+    return {
+        "source": src_path,
+        "dest": dest_path,
+        "title": title,
+        "summary": summary or "",
+        "mtime": os.stat(src_path).st_mtime,
+    }
+
+
+def page_url(dest_path, dest_dir):
+    rel_path = os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def _absolute_url(site_url, base_path, url):
+    base_path = base_path or "/"
+    return site_url.rstrip("/") + base_path.rstrip("/") + url
+
+
+def write_sitemap(pages, dest_dir, site_url, base_path=None):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for page in sorted(pages, key=lambda page: page_url(page["dest"], dest_dir)):
+        loc = _absolute_url(site_url, base_path, page_url(page["dest"], dest_dir))
+        lastmod = datetime.fromtimestamp(page["mtime"], timezone.utc).strftime("%Y-%m-%d")
+        lines.append(f"  <url><loc>{html.escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append("</urlset>")
+    path = os.path.join(dest_dir, "sitemap.xml")
+    write_output(path, "\n".join(lines) + "\n")
+    return path
+
+
+def write_feed(posts, dest_dir, site_url, base_path=None, title="Blog"):
+    link = _absolute_url(site_url, base_path, "/blog/")
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"  <title>{html.escape(title)}</title>",
+        f"  <link>{html.escape(link)}</link>",
+        f"  <description>{html.escape(title)}</description>",
+    ]
+    for post in posts[:FEED_SIZE]:
+        url = _absolute_url(site_url, base_path, page_url(post["dest"], dest_dir))
+        published = format_datetime(datetime.fromtimestamp(post["mtime"], timezone.utc))
+        lines.extend(
+            [
+                "  <item>",
+                f"    <title>{html.escape(post['title'])}</title>",
+                f"    <link>{html.escape(url)}</link>",
+                f"    <guid>{html.escape(url)}</guid>",
+                f"    <pubDate>{published}</pubDate>",
+                f"    <description>{html.escape(post['summary'])}</description>",
+                "  </item>",
+            ]
+        )
+    lines.extend(["</channel>", "</rss>"])
+    path = os.path.join(dest_dir, "feed.xml")
+    write_output(path, "\n".join(lines) + "\n")
+    return path
+
+
+def _listing_path(dest_dir, number):
+    if number == 1:
+        return os.path.join(dest_dir, "blog", "index.html")
+    return os.path.join(dest_dir, "blog", "page", str(number), "index.html")
+
+
+def _listing_url(number):
+    return "/blog/" if number == 1 else f"/blog/page/{number}/"
+
+
+def write_blog_index(posts, dest_dir, template, base_path=None, page_size=10, title="Blog", reserved=()):
+    page_count = max(1, -(-len(posts) // page_size))
+    written = []
+    for number in range(1, page_count + 1):
+        path = _listing_path(dest_dir, number)
+        if os.path.normpath(path) in reserved:
+            continue
+        items = []
+        for post in posts[(number - 1) * page_size : number * page_size]:
+            link = LeafNode("a", html.escape(post["title"]), {"href": page_url(post["dest"], dest_dir)})
+            summary = LeafNode("p", html.escape(post["summary"]))
+            items.append(ParentNode("li", [link, summary]))
+        children = [LeafNode("h1", title), ParentNode("ul", items) if items else LeafNode("p", "No posts yet.")]
+        nav = []
+        if number > 1:
+            nav.append(LeafNode("a", "Newer posts", {"href": _listing_url(number - 1), "rel": "prev"}))
+        if number < page_count:
+            nav.append(LeafNode("a", "Older posts", {"href": _listing_url(number + 1), "rel": "next"}))
+        if nav:
+            children.append(ParentNode("nav", nav))
+        root = apply_base_path(ParentNode("div", children), base_path)
+
+        heading = title if number == 1 else f"{title} (page {number})"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_output(path) as f:
+            template.stream(f, Title=heading, Content=root)
+        written.append(path)
+    return written
+
+
+def _is_post(dest_path, dest_dir):
+    url = page_url(dest_path, dest_dir)
+    return url.startswith("/blog/") and url != "/blog/"
+
+
+def site_index_outputs(page_dests, dest_dir, site_url=None, page_size=10):
+    # The files build_site_index will write for these pages, known before any
+    # page is rendered so the static sync can keep them.
+    posts = [dest for dest in page_dests if _is_post(dest, dest_dir)]
+    reserved = {os.path.normpath(dest) for dest in page_dests}
+    page_count = max(1, -(-len(posts) // page_size))
+    paths = [_listing_path(dest_dir, number) for number in range(1, page_count + 1)]
+    paths = [path for path in paths if os.path.normpath(path) not in reserved]
+    if site_url:
+        paths.extend([os.path.join(dest_dir, "sitemap.xml"), os.path.join(dest_dir, "feed.xml")])
+    return paths
+
+
+def build_site_index(pages, dest_dir, template, site_url, base_path=None, page_size=10):
+    posts = [page for page in pages if _is_post(page["dest"], dest_dir)]
+    posts.sort(key=lambda post: (-post["mtime"], post["dest"]))
+    # Never overwrite a listing page that comes from real content.
+    reserved = {os.path.normpath(page["dest"]) for page in pages}
+
+    written = write_blog_index(posts, dest_dir, template, base_path, page_size, reserved=reserved)
+    if site_url:
+        written.append(write_sitemap(pages, dest_dir, site_url, base_path))
+        written.append(write_feed(posts, dest_dir, site_url, base_path))
+    return written
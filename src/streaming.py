@@ -0,0 +1,72 @@
+from collections import deque
+
+from blocks_markdown import block_to_html_node
+from htmlnode import LeafNode, apply_base_path
+
+# Sources at least this big are rendered block by block instead of being read
+# into memory whole.
+STREAMING_THRESHOLD = 8 << 20
+
+
+class BlockReader:
+    # Yields the same blocks as markdown_to_blocks while reading a file handle
+    # line by line, and picks up the h1 title on the way.
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        block = []
+        for line in self.lines:
+            if self.title is None:
+                stripped = line.lstrip()
+                if stripped.startswith("# "):
+                    self.title = stripped[2:].strip()
+            # Lines from a file always end in "\n", so a bare "\n" line is
+            # exactly a "\n\n" boundary in the original text.
+            if line == "\n":
+                text = "".join(block).strip()
+                block = []
+                if text:
+                    yield text
+            else:
+                block.append(line)
+        text = "".join(block).strip()
+        if text:
+            yield text
+
+
+def _render_block(block, cache, base_path):
+    if cache is not None:
+        return LeafNode(None, cache.render(block, base_path))
+    return apply_base_path(block_to_html_node(block), base_path)
+
+
+def render_blocks(blocks, cache=None, base_path=None):
+    yield "<div>"
+    for block in blocks:
+        yield _render_block(block, cache, base_path)
+    yield "</div>"
+
+
+def stream_page(source, template, sink, cache=None, base_path=None, watch_blocks=None):
+    reader = BlockReader(source)
+    blocks = iter(reader)
+
+    # The title slot comes before the content, so buffer blocks until the
+    # heading shows up (normally the very first one).
+    pending = deque()
+    while reader.title is None:
+        try:
+            pending.append(next(blocks))
+        except StopIteration:
+            raise Exception("No h1 title found in markdown")
+
+    def all_blocks():
+        while pending:
+            yield pending.popleft()
+        yield from blocks
+
+    ordered = all_blocks() if watch_blocks is None else watch_blocks(all_blocks())
+    template.stream(sink, Title=reader.title, Content=render_blocks(ordered, cache, base_path))
+    return reader.title
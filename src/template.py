@@ -0,0 +1,100 @@
+import os
+import re
+
+from htmlnode import HTMLNode, write_html
+
+PLACEHOLDER_RE = re.compile(r"\{\{ (Title|Content) \}\}")
+PARTIAL_RE = re.compile(r"\{\{> (\S+) \}\}")
+MAX_PARTIAL_DEPTH = 8
+
+_template_cache = {}
+
+
+def rewrite_root_urls(html, base_path):
+    if base_path is None or base_path == "/":
+        return html
+    html = html.replace('href="/', f'href="{base_path}')
+    return html.replace('src="/', f'src="{base_path}')
+
+
+def expand_partials(text, include_dir, dependencies, depth=0):
+    # "{{> partials/nav.html }}" is replaced by that file's text, resolved
+    # against include_dir; every file read is appended to dependencies.
+    def include(match):
+        if depth >= MAX_PARTIAL_DEPTH:
+            raise ValueError(f"Partials nested more than {MAX_PARTIAL_DEPTH} deep: {match.group(1)}")
+        path = os.path.normpath(os.path.join(include_dir, match.group(1)))
+        with open(path, "r") as f:
+            partial = f.read()
+        dependencies.append(path)
+        return expand_partials(partial.rstrip("\n"), os.path.dirname(path), dependencies, depth + 1)
+
+    return PARTIAL_RE.sub(include, text)
+
+
+class CompiledTemplate:
+    def __init__(self, text, base_path=None, path=None):
+        # dependencies lists the template file and every partial it pulled in.
+        self.dependencies = [] if path is None else [os.path.normpath(path)]
+        include_dir = "" if path is None else os.path.dirname(path)
+        text = expand_partials(text, include_dir, self.dependencies)
+
+        # segments always has one more entry than slots: literal, slot, literal, ...
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            self.segments.append(rewrite_root_urls(text[pos:match.start()], base_path))
+            self.slots.append(match.group(1))
+            pos = match.end()
+        self.segments.append(rewrite_root_urls(text[pos:], base_path))
+
+    def render(self, **values):
+        parts = [self.segments[0]]
+        for slot, literal in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(literal)
+        return "".join(parts)
+
+    def stream(self, sink, **values):
+        # Like render(), but writes to a file-like sink; HTMLNode values are
+        # serialized straight into it rather than joined into one string first.
+        # A value may also be an iterable of strings and nodes, consumed lazily.
+        sink.write(self.segments[0])
+        for slot, literal in zip(self.slots, self.segments[1:]):
+            _write_value(values[slot], sink)
+            sink.write(literal)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(slots: {self.slots})"
+
+
+def _write_value(value, sink):
+    if isinstance(value, str):
+        sink.write(value)
+    elif isinstance(value, HTMLNode):
+        write_html(value, sink)
+    else:
+        for part in value:
+            _write_value(part, sink)
+
+
+def _stamps(paths):
+    try:
+        return tuple(os.stat(path).st_mtime_ns for path in paths)
+    except FileNotFoundError:
+        return None
+
+
+def load_template(template_path, base_path=None):
+    # Revalidated against the mtimes of the template and its partials so a
+    # long-lived process still notices edits to any of them.
+    key = (os.path.abspath(template_path), base_path)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[1] is not None and _stamps(cached[0].dependencies) == cached[1]:
+        return cached[0]
+    with open(template_path, "r") as f:
+        template = CompiledTemplate(f.read(), base_path, template_path)
+    _template_cache.clear()
+    _template_cache[key] = (template, _stamps(template.dependencies))
+    return template
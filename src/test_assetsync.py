@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from assetsync import sync_directory
+from buildoptions import BuildOptions, set_build_options
+from testsupport import TempDirTestCase
+
+
+class TestSyncDirectory(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.src, "images"))
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "a.png"), "png")
+
+    def test_first_sync_copies_and_preserves_mtime(self):
+        stats = sync_directory(self.src, self.dest)
+        self.assertEqual(stats["copied"], 2)
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(src_stat.st_mtime_ns, dest_stat.st_mtime_ns)
+
+    def test_second_sync_copies_nothing(self):
+        sync_directory(self.src, self.dest)
+        stats = sync_directory(self.src, self.dest)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.src, self.dest)
+        self.write(os.path.join(self.src, "index.css"), "body { color: red }")
+        stats = sync_directory(self.src, self.dest)
+        self.assertEqual(stats["copied"], 1)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    def test_checksum_skips_touched_but_identical_file(self):
+        sync_directory(self.src, self.dest)
+        path = os.path.join(self.src, "index.css")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(sync_directory(self.src, self.dest, checksum=True)["copied"], 0)
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns, 0)
+
+    def test_orphans_removed_except_kept(self):
+        sync_directory(self.src, self.dest)
+        os.makedirs(os.path.join(self.dest, "old"))
+        self.write(os.path.join(self.dest, "old", "gone.png"), "x")
+        page = os.path.join(self.dest, "index.html")
+        self.write(page, "<p></p>")
+        stats = sync_directory(self.src, self.dest, keep=[page])
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hard_links(self):
+        stats = sync_directory(self.src, self.dest, link="hard")
+        self.assertEqual(stats["linked"], 2)
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.src, "index.css"), os.path.join(self.dest, "index.css"))
+        )
+        self.assertEqual(sync_directory(self.src, self.dest, link="hard")["unchanged"], 2)
+
+    def test_minified_stylesheet_replaces_hard_link(self):
+        self.write(os.path.join(self.src, "index.css"), "body {\n  color: red;\n}\n")
+        sync_directory(self.src, self.dest, link="hard")
+        set_build_options(BuildOptions(minify=True))
+        try:
+            self.assertEqual(sync_directory(self.src, self.dest, link="hard")["copied"], 1)
+            self.assertEqual(sync_directory(self.src, self.dest, link="hard")["unchanged"], 2)
+        finally:
+            set_build_options(BuildOptions())
+        with open(os.path.join(self.src, "index.css")) as f:
+            self.assertEqual(f.read(), "body {\n  color: red;\n}\n")
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body{color:red}")
+
+
+if __name__ == "__main__":
+    unittest.main()
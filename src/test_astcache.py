@@ -0,0 +1,104 @@
+import os
+import unittest
+
+import makesite
+from astcache import AstCache, CachedTree, configure_ast_cache, flatten_tree, iter_flat_html
+from blocks_markdown import markdown_to_html_node
+from buildoptions import BuildOptions, set_build_options
+from depgraph import PageRefs
+from htmlnode import LeafNode, ParentNode, iter_html
+from template import CompiledTemplate
+from testsupport import TempDirTestCase
+
+
+class TestFlatTree(unittest.TestCase):
+    def test_serializes_like_the_tree(self):
+        root = markdown_to_html_node(
+            "# Title\n\n> quote **bold**\n\n- a [link](/x)\n- ![img](/i.png)\n\n```\ncode\n```"
+        )
+        self.assertEqual("".join(iter_flat_html(flatten_tree(root))), "".join(iter_html(root)))
+
+    def test_empty_parents_and_deep_trees(self):
+        root = ParentNode("div", [ParentNode("span", []), LeafNode(None, "x")])
+        for _ in range(5000):
+            root = ParentNode("div", [root])
+        self.assertEqual("".join(CachedTree(flatten_tree(root))), "".join(iter_html(root)))
+
+
+class TestAstCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = configure_ast_cache(os.path.join(self.tmp.name, "ast"))
+        self.template = CompiledTemplate("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        configure_ast_cache(None)
+
+    def test_hit_renders_the_same_page(self):
+        markdown = "# Hello\n\nSome _text_ and [a link](/about).\n\n1. one\n2. two"
+        first = makesite.render_markdown(markdown, self.template, "/site/")
+        second = makesite.render_markdown(markdown, self.template, "/site/")
+        self.assertEqual(second[:3], first[:3])
+        self.assertEqual(self.cache.counters(), {"hits": 1, "misses": 1})
+
+    def test_key_covers_every_input(self):
+        content = os.path.join(self.tmp.name, "content")
+        self.write(os.path.join(content, "other.md"), "# Other")
+        markdown = "# Page\n\nSee [](/other)"
+        key = AstCache.key(markdown, "/", PageRefs(content))
+        self.assertEqual(AstCache.key(markdown, "/", PageRefs(content)), key)
+        self.assertNotEqual(AstCache.key(markdown, "/site/", PageRefs(content)), key)
+        self.assertNotEqual(AstCache.key(markdown + "!", "/", PageRefs(content)), key)
+        self.write(os.path.join(content, "other.md"), "# Renamed")
+        os.utime(os.path.join(content, "other.md"), ns=(1, 1))
+        self.assertNotEqual(AstCache.key(markdown, "/", PageRefs(content)), key)
+
+    def test_hit_restores_recorded_links(self):
+        content = os.path.join(self.tmp.name, "content")
+        self.write(os.path.join(content, "other.md"), "# Other")
+        markdown = "# Page\n\nSee [](/other)"
+        makesite.render_markdown(markdown, self.template, None, content)
+        page, _, _, refs = makesite.render_markdown(markdown, self.template, None, content)
+        self.assertIn('<a href="/other">Other</a>', page)
+        self.assertEqual(refs.links, {"/other": [os.path.join(content, "other.md"), "Other"]})
+        self.assertIsNone(refs.urls)
+        self.assertEqual(self.cache.hits, 1)
+
+        set_build_options(BuildOptions(link_check="warn"))
+        try:
+            makesite.render_markdown(markdown, self.template, None, content)
+            page, _, _, refs = makesite.render_markdown(markdown, self.template, None, content)
+        finally:
+            set_build_options(BuildOptions())
+        self.assertEqual(refs.urls, {"/other": "link"})
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_corrupt_entry_is_a_miss(self):
+        markdown = "# Hello\n\nworld"
+        makesite.render_markdown(markdown, self.template)
+        key = AstCache.key(markdown)
+        with open(self.cache._entry_path(key), "wb") as f:
+            f.write(b"\x00garbage")
+        page = makesite.render_markdown(markdown, self.template)[0]
+        self.assertEqual(page, "<title>Hello</title><div><h1>Hello</h1><p>world</p></div>")
+        self.assertEqual(self.cache.counters(), {"hits": 0, "misses": 2})
+
+    def test_prune_drops_least_recently_used(self):
+        makesite.render_markdown("# A", self.template)
+        makesite.render_markdown("# B", self.template)
+        paths = [self.cache._entry_path(AstCache.key(markdown)) for markdown in ("# A", "# B")]
+        for path in paths:
+            os.utime(path, ns=(1, 1))
+        makesite.render_markdown("# A", self.template)
+        self.assertEqual(self.cache.prune(), 0)
+
+        self.cache.max_bytes = os.path.getsize(paths[0])
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertFalse(os.path.exists(paths[1]))
+        self.assertEqual(makesite.render_markdown("# A", self.template)[0], "<title>A</title><div><h1>A</h1></div>")
+        self.assertEqual(self.cache.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+from unittest import mock
+
+import asyncbuild
+from asyncbuild import generate_pages_async
+from buildoptions import BuildOptions, set_build_options
+from parallel import BuildError, generate_pages_parallel
+from testsupport import TempDirTestCase
+
+
+class TestAsyncBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        for section in ("a", "b"):
+            os.makedirs(os.path.join(self.content, section))
+            for i in range(4):
+                self.write(
+                    os.path.join(self.content, section, f"p{i}.md"),
+                    f"# {section} {i}\n\nBody with [link](/{section}/{i})",
+                )
+        self.write(self.template, '<title>{{ Title }}</title><link href="/x.css">{{ Content }}')
+        set_build_options(BuildOptions(quiet=True))
+
+    def tearDown(self):
+        set_build_options(BuildOptions())
+
+    def test_matches_process_pool_build(self):
+        sync_docs = os.path.join(self.tmp.name, "sync")
+        async_docs = os.path.join(self.tmp.name, "async")
+        generate_pages_parallel(self.content, self.template, sync_docs, "/site/", jobs=1)
+        pages = generate_pages_async(self.content, self.template, async_docs, "/site/", io_concurrency=3)
+        self.assertEqual(len(pages), 8)
+        self.assertEqual(self.read_tree(async_docs), self.read_tree(sync_docs))
+        self.assertEqual(pages[0]["title"], "a 0")
+
+    def test_large_pages_are_streamed(self):
+        sync_docs = os.path.join(self.tmp.name, "sync")
+        async_docs = os.path.join(self.tmp.name, "async")
+        generate_pages_parallel(self.content, self.template, sync_docs, "/site/", jobs=1)
+        # Every page counts as large, so none may be read into memory whole.
+        with mock.patch.object(asyncbuild, "STREAMING_THRESHOLD", 0), mock.patch.object(
+            asyncbuild, "_read", side_effect=AssertionError("read whole")
+        ):
+            for jobs in (1, 2):
+                pages = generate_pages_async(self.content, self.template, async_docs, "/site/", jobs, 3)
+                self.assertEqual(len(pages), 8)
+                self.assertEqual(self.read_tree(async_docs), self.read_tree(sync_docs))
+
+    def test_reports_every_failure(self):
+        self.write(os.path.join(self.content, "a", "bad1.md"), "no title")
+        self.write(os.path.join(self.content, "b", "bad2.md"), "no title either")
+        with self.assertRaises(BuildError) as cm:
+            generate_pages_async(self.content, self.template, os.path.join(self.tmp.name, "docs"))
+        self.assertEqual(
+            [os.path.basename(src) for src, _ in cm.exception.failures], ["bad1.md", "bad2.md"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ from blocks_markdown import (
     BlockType,
     markdown_to_blocks,
     block_to_block_type,
+    classify_block,
     markdown_to_html_node,
 )
 
@@ -107,6 +108,17 @@ class TestMarkdownBlocks(unittest.TestCase):
         """)
         self.assertNotEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
 
+    def test_classify_block_strips_list_prefixes(self):
+        self.assertEqual(
+            classify_block("1. first\n2. second\n3.  third"),
+            (BlockType.ORDERED_LIST, ("first", "second", "third")),
+        )
+        self.assertEqual(
+            classify_block("- a\n- b"),
+            (BlockType.UNORDERED_LIST, ("a", "b")),
+        )
+        self.assertEqual(classify_block("01. zero-padded"), (BlockType.PARAGRAPH, None))
+
     def test_is_paragraph(self):
         block = "Hello World!"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
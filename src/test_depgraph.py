@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import PageRefs, explain_stale, resolve_page
+from testsupport import TempDirTestCase
+
+
+class TestPageRefs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.tmp.name
+        os.makedirs(os.path.join(self.content, "blog", "tom"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHi")
+        self.write(os.path.join(self.content, "blog", "tom", "index.md"), "Intro\n\n# Tom [Bombadil]\n")
+        self.write(os.path.join(self.content, "contact.md"), "# Contact\n")
+
+    def test_resolve_page(self):
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        for url in ("/blog/tom", "/blog/tom/", "/blog/tom/index.html", "/blog/tom/#top"):
+            self.assertEqual(resolve_page(self.content, url), tom)
+        self.assertEqual(resolve_page(self.content, "/"), os.path.join(self.content, "index.md"))
+        self.assertEqual(resolve_page(self.content, "/contact"), os.path.join(self.content, "contact.md"))
+        self.assertIsNone(resolve_page(self.content, "/missing"))
+
+    def test_fill_records_links(self):
+        refs = PageRefs(self.content)
+        block = "See [](/blog/tom/), [](/nope), [text](/contact) and ![](/img.png)"
+        self.assertEqual(
+            refs.fill(block),
+            "See [Tom Bombadil](/blog/tom/), [/nope](/nope), [text](/contact) and ![](/img.png)",
+        )
+        self.assertEqual(
+            refs.links,
+            {
+                "/blog/tom/": [os.path.join(self.content, "blog", "tom", "index.md"), "Tom [Bombadil]"],
+                "/nope": [None, None],
+            },
+        )
+        self.assertEqual(refs.fill("```\n[](/blog/tom/)\n```"), "```\n[](/blog/tom/)\n```")
+
+
+class TestExplainStale(unittest.TestCase):
+    def test_reasons(self):
+        with tempfile.NamedTemporaryFile() as dest:
+            entry = {"hash": "a", "dest": dest.name}
+            previous = {
+                "hash": "a",
+                "dest": dest.name,
+                "meta": {"deps": {"files": ["page.md", "template.html"], "links": {"/x": ["x.md", "X"]}}},
+            }
+            links = {"/x": ["x.md", "X"]}
+
+            def explain(changed=()):
+                return explain_stale(entry, previous, dest.name, set(changed), links.get)
+
+            self.assertIsNone(explain())
+            self.assertEqual(explain(["template.html"]), "template.html changed")
+            links["/x"] = ["x.md", "Y"]
+            self.assertEqual(explain(), "title of x.md changed")
+            self.assertEqual(explain_stale(entry, None, dest.name, set(), links.get), "new page")
+            self.assertEqual(explain_stale(entry, {"hash": "b"}, dest.name, set(), links.get), "source changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import http.client
+import os
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from devserver import (
+    LIVE_RELOAD_PATH,
+    LIVE_RELOAD_SCRIPT,
+    LiveReload,
+    inject_reload_script,
+    snapshot,
+    start_server,
+    watch,
+)
+
+
+class TestDevServer(unittest.TestCase):
+    def test_inject_before_body_close(self):
+        html = inject_reload_script("<body><p>x</p></body></html>")
+        self.assertEqual(html, f"<body><p>x</p>{LIVE_RELOAD_SCRIPT}</body></html>")
+
+    def test_inject_without_body(self):
+        self.assertEqual(inject_reload_script("<p>x</p>"), "<p>x</p>" + LIVE_RELOAD_SCRIPT)
+
+    def test_live_reload_wakes_waiters(self):
+        live_reload = LiveReload()
+        threading.Timer(0.01, live_reload.notify).start()
+        self.assertEqual(live_reload.wait(0, timeout=5), 1)
+        self.assertEqual(live_reload.wait(1, timeout=0.01), 1)
+
+    def test_snapshot_sees_new_and_changed_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            nested = os.path.join(tmp, "a", "b")
+            os.makedirs(nested)
+            path = os.path.join(nested, "page.md")
+            with open(path, "w") as f:
+                f.write("# One")
+            before = snapshot([tmp])
+            self.assertIn(path, before)
+            with open(path, "a") as f:
+                f.write("\n\nmore")
+            self.assertNotEqual(snapshot([tmp]), before)
+
+
+    def test_server_injects_script_and_streams_reloads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.html"), "w") as f:
+                f.write("<body>hi</body>")
+            live_reload = LiveReload()
+            server = start_server(tmp, 0, live_reload)
+            try:
+                port = server.server_address[1]
+                conn = http.client.HTTPConnection("localhost", port, timeout=5)
+                conn.request("GET", "/")
+                self.assertIn(LIVE_RELOAD_SCRIPT, conn.getresponse().read().decode("utf-8"))
+
+                events = http.client.HTTPConnection("localhost", port, timeout=5)
+                events.request("GET", LIVE_RELOAD_PATH)
+                response = events.getresponse()
+                self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+                threading.Timer(0.05, live_reload.notify).start()
+                self.assertEqual(response.readline(), b"event: reload\n")
+                events.close()
+                conn.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_rebuilds_after_change_and_survives_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            static = os.path.join(tmp, "static")
+            os.makedirs(content)
+            os.makedirs(static)
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            page = os.path.join(content, "index.md")
+            with open(page, "w") as f:
+                f.write("# One")
+
+            builds = []
+
+            def build():
+                builds.append(time.monotonic())
+                if len(builds) == 1:
+                    raise FileNotFoundError("template.html")
+
+            stop = threading.Event()
+            args = (content, static, template, tmp, None, build)
+            thread = threading.Thread(target=watch, args=args, kwargs={"port": 0, "interval": 0.01, "stop": stop})
+            with redirect_stdout(StringIO()) as out:
+                thread.start()
+                try:
+                    deadline = time.monotonic() + 5
+                    while not builds and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                    time.sleep(0.05)
+                    with open(page, "w") as f:
+                        f.write("# Two, edited")
+                    while len(builds) < 2 and time.monotonic() < deadline:
+                        time.sleep(0.01)
+                finally:
+                    stop.set()
+                    thread.join(5)
+            self.assertEqual(len(builds), 2)
+            self.assertIn("Build failed: FileNotFoundError", out.getvalue())
+            self.assertIn("Rebuilt in", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
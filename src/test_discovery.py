@@ -0,0 +1,56 @@
+import os
+import unittest
+
+from discovery import build_plan, scan_tree
+from testsupport import TempDirTestCase
+
+
+class TestDiscovery(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.docs = os.path.join(root, "docs")
+        for rel_path in ["index.md", "b.md", "notes.txt", "blog/tom/index.md", "blog/a/index.md"]:
+            self._touch(os.path.join(self.content, rel_path))
+        for rel_path in ["index.css", "images/tom.png"]:
+            self._touch(os.path.join(self.static, rel_path))
+
+    def _touch(self, path):
+        self.write(path, path)
+
+    def test_scan_tree_orders_like_sorted_walk(self):
+        names = [os.path.join(rel_dir, name) for rel_dir, name, _ in scan_tree(self.content)]
+        self.assertEqual(
+            names,
+            ["b.md", "index.md", "notes.txt", os.path.join("blog", "a", "index.md"), os.path.join("blog", "tom", "index.md")],
+        )
+
+    def test_build_plan(self):
+        plan = build_plan(self.content, self.static, self.docs)
+        self.assertEqual(
+            [os.path.relpath(dest, self.docs) for dest in plan.page_dests()],
+            ["b.html", "index.html", os.path.join("blog", "a", "index.html"), os.path.join("blog", "tom", "index.html")],
+        )
+        stats = plan.asset_stats()
+        self.assertEqual(sorted(stats), ["images/tom.png".replace("/", os.sep), "index.css"])
+        self.assertEqual(stats["index.css"].st_size, os.path.getsize(os.path.join(self.static, "index.css")))
+
+    def test_symlinked_directories_are_followed(self):
+        shared = os.path.join(self.tmp.name, "shared")
+        self._touch(os.path.join(shared, "post.md"))
+        os.symlink(shared, os.path.join(self.content, "linked"))
+        os.symlink(self.content, os.path.join(self.content, "blog", "loop"))
+        os.symlink(os.path.join(self.tmp.name, "gone"), os.path.join(self.content, "dangling.md"))
+        names = [os.path.join(rel_dir, name) for rel_dir, name, _ in scan_tree(self.content)]
+        self.assertIn(os.path.join("linked", "post.md"), names)
+        self.assertNotIn("dangling.md", names)
+        self.assertFalse(any(name.startswith(os.path.join("blog", "loop")) for name in names))
+
+    def test_missing_tree(self):
+        self.assertEqual(scan_tree(os.path.join(self.tmp.name, "nope")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import io
+import sys
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, iter_html, write_html
 
 class TestHTMLNode(unittest.TestCase):
     def test_p(self):
@@ -61,7 +63,50 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(parent_node.to_html(), "<div><span><b>grandchild</b></span></div>")
 
 
-if __name__ == "__main__":
-    unittest.main()
+class TestIterativeSerializer(unittest.TestCase):
+    def test_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/x", "target": "_blank"}),
+            ],
+            {"class": "c"},
+        )
+        self.assertEqual(
+            "".join(iter_html(node)),
+            '<div class="c"><p><b>bold</b> text</p><a href="/x" target="_blank">link</a></div>',
+        )
+
+    def test_write_html_to_list_and_file(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)])
+        fragments = write_html(node, [])
+        buffer = write_html(node, io.StringIO())
+        self.assertEqual("".join(fragments), buffer.getvalue())
+        self.assertEqual(buffer.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode(None, "x")
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertIn(">x<", html)
 
+    def test_invalid_child_raises(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode(None, [])]).to_html()
+
+
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_tags_are_interned(self):
+        level = 2
+        self.assertIs(LeafNode(f"h{level}", "x").tag, LeafNode("h" + str(level), "y").tag)
 
+
+if __name__ == "__main__":
+    unittest.main()
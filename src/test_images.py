@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from discovery import plan_assets
+from htmlnode import apply_base_path
+from images import (
+    build_images,
+    decode_png,
+    encode_png,
+    png_size,
+    resize_rows,
+    set_image_catalog,
+)
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+def _gradient(width, height):
+    return [bytearray(v for x in range(width) for v in (x * 10 % 256, y * 20 % 256, 128)) for y in range(height)]
+
+
+class TestPngCodec(unittest.TestCase):
+    def test_round_trip_and_size(self):
+        rows = _gradient(12, 5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "a.png")
+            with open(path, "wb") as f:
+                f.write(encode_png(rows, 12, 5, 2, [(b"sRGB", b"\x00")]))
+            self.assertEqual(png_size(path), (12, 5))
+            width, height, colour, decoded, extra = decode_png(path)
+            self.assertEqual((width, height, colour), (12, 5, 2))
+            self.assertEqual(decoded, rows)
+            self.assertEqual(extra, [(b"sRGB", b"\x00")])
+
+    def test_not_a_png(self):
+        with tempfile.NamedTemporaryFile(suffix=".png") as f:
+            f.write(b"GIF89a" + bytes(30))
+            f.flush()
+            with self.assertRaises(ValueError):
+                png_size(f.name)
+
+    def test_resize_averages_boxes(self):
+        rows = [bytearray([0, 100, 200, 50]), bytearray([100, 100, 0, 50])]
+        self.assertEqual(resize_rows(rows, 4, 1, 2, 1), [bytearray([75, 75])])
+
+
+class TestBuildImages(unittest.TestCase):
+    def tearDown(self):
+        set_image_catalog(None)
+
+    def test_variants_are_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            cache = os.path.join(tmp, "cache")
+            os.makedirs(os.path.join(static, "images"))
+            os.makedirs(os.path.join(docs, "images"))
+            with open(os.path.join(static, "images", "wide.png"), "wb") as f:
+                f.write(encode_png(_gradient(40, 20), 40, 20, 2))
+
+            catalog, variants = build_images(plan_assets(static, docs), cache, widths=(10, 20, 80))
+            self.assertEqual(
+                catalog["/images/wide.png"],
+                {
+                    "width": 40,
+                    "height": 20,
+                    "srcset": "/images/wide-10w.png 10w, /images/wide-20w.png 20w, /images/wide.png 40w",
+                },
+            )
+            self.assertEqual(variants, [os.path.join(docs, "images", f"wide-{w}w.png") for w in (10, 20)])
+            self.assertEqual(png_size(variants[0]), (10, 5))
+
+            cached = sorted(name for name in os.listdir(cache) if name.endswith(".png"))
+            stamps = [os.stat(os.path.join(cache, name)).st_mtime_ns for name in cached]
+            build_images(plan_assets(static, docs), cache, widths=(10, 20, 80))
+            self.assertEqual([os.stat(os.path.join(cache, name)).st_mtime_ns for name in cached], stamps)
+
+    def test_changed_image_replaces_its_cached_variants(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            cache = os.path.join(tmp, "cache")
+            os.makedirs(static)
+            image = os.path.join(static, "wide.png")
+            with open(image, "wb") as f:
+                f.write(encode_png(_gradient(40, 20), 40, 20, 2))
+            build_images(plan_assets(static, os.path.join(tmp, "docs")), cache, widths=(10,))
+            before = set(os.listdir(cache))
+
+            with open(image, "wb") as f:
+                f.write(encode_png(_gradient(40, 10), 40, 10, 2))
+            build_images(plan_assets(static, os.path.join(tmp, "docs")), cache, widths=(10,))
+            after = set(os.listdir(cache))
+            self.assertEqual(len(after), 2)
+            self.assertEqual(before & after, {"index.json"})
+
+    def test_damaged_image_keeps_its_size(self):
+        # A valid header in front of image data that won't decompress.
+        data = encode_png(_gradient(40, 20), 40, 20, 2)
+        start = data.index(b"IDAT") + 4
+        damaged = data[:start] + bytes(len(data) - start - 16) + data[-16:]
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs), tempfile.TemporaryDirectory() as tmp:
+                static = os.path.join(tmp, "static")
+                os.makedirs(static)
+                for name in ("bad.png", "good.png"):
+                    with open(os.path.join(static, name), "wb") as f:
+                        f.write(damaged if name == "bad.png" else data)
+                catalog, variants = build_images(
+                    plan_assets(static, os.path.join(tmp, "docs")), os.path.join(tmp, "cache"), jobs, widths=(10,)
+                )
+                self.assertEqual(catalog["/bad.png"], {"width": 40, "height": 20, "srcset": None})
+                self.assertEqual(variants, [os.path.join(tmp, "docs", "good-10w.png")])
+
+    def test_empty_output_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "images", "wide.png"), "wb") as f:
+                f.write(encode_png(_gradient(40, 20), 40, 20, 2))
+
+            _, variants = build_images(plan_assets(static, docs), os.path.join(tmp, "cache"), widths=(10,))
+            self.assertEqual(variants, [os.path.join(docs, "images", "wide-10w.png")])
+            self.assertEqual(png_size(variants[0]), (10, 5))
+
+    def test_image_nodes_get_attributes(self):
+        set_image_catalog({"/images/a.png": {"width": 40, "height": 20, "srcset": "/images/a-10w.png 10w, /images/a.png 40w"}})
+        node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"))
+        apply_base_path(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/site/images/a.png" alt="A" width="40" height="20" '
+            'srcset="/site/images/a-10w.png 10w, /site/images/a.png 40w" loading="lazy" decoding="async"></img>',
+        )
+        other = text_node_to_html_node(TextNode("B", TextType.IMAGE, "https://example.com/b.png"))
+        self.assertEqual(other.props, {"src": "https://example.com/b.png", "alt": "B"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import unittest
+
+from assetsync import sync_directory
+from discovery import build_plan
+from images import encode_png, set_image_catalog
+from incremental import build_incremental, save_build_manifest
+from manifest import empty_manifest
+from parallel import generate_pages_parallel
+from testsupport import TempDirTestCase
+
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, ".build", "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, '<title>{{ Title }}</title><a href="/x">{{ Content }}</a>')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nWords")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        set_image_catalog(None)
+
+    def _build(self, base_path="/", image_cache_dir=None):
+        return build_incremental(
+            self.content, self.static, self.template, self.docs, base_path, self.manifest, 1, image_cache_dir
+        )
+
+    def test_first_build_generates_everything(self):
+        stats = self._build()
+        self.assertEqual(stats["generated"], 2)
+        self.assertEqual(stats["copied"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+
+    def test_second_build_skips_unchanged(self):
+        self._build()
+        stats = self._build()
+        self.assertEqual(stats["generated"], 0)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["skipped"], 3)
+
+    def test_full_build_manifest_skips_everything(self):
+        plan = build_plan(self.content, self.static, self.docs)
+        sync_directory(self.static, self.docs, keep=plan.page_dests())
+        pages = generate_pages_parallel(self.content, self.template, self.docs, "/", 1, plan)
+        save_build_manifest(self.manifest, empty_manifest(), plan, self.template, "/", pages)
+        stats = self._build()
+        self.assertEqual(stats["generated"], 0)
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["skipped"], 3)
+        by_source = lambda page: page["source"]
+        self.assertEqual(sorted(stats["pages"], key=by_source), sorted(pages, key=by_source))
+
+    def test_skipped_pages_keep_their_metadata(self):
+        first = self._build()["pages"]
+        second = self._build()["pages"]
+        self.assertEqual(second, first)
+        self.assertEqual(sorted(page["title"] for page in second), ["Home", "Post"])
+
+    def test_changed_source_rebuilds_only_that_page(self):
+        self._build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        stats = self._build()
+        self.assertEqual(stats["generated"], 1)
+
+    def test_template_or_base_path_change_rebuilds_all_pages(self):
+        self._build()
+        self.assertEqual(self._build("/site/")["generated"], 2)
+        self.write(self.template, "<p>{{ Title }}</p>{{ Content }}")
+        self.assertEqual(self._build("/site/")["generated"], 2)
+
+    def test_partial_change_rebuilds_pages(self):
+        self.write(os.path.join(self.tmp.name, "footer.html"), "<footer>one</footer>")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}{{> footer.html }}")
+        self._build()
+        self.assertEqual(self._build()["generated"], 0)
+        self.write(os.path.join(self.tmp.name, "footer.html"), "<footer>two</footer>")
+        stats = self._build()
+        self.assertEqual(stats["generated"], 2)
+        self.assertTrue(stats["reasons"][0][1].endswith("footer.html changed"))
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("<footer>two</footer>", f.read())
+
+    def test_linked_title_change_rebuilds_only_linking_pages(self):
+        index = os.path.join(self.content, "index.md")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(index, "# Home\n\nRead [](/blog/post.html)")
+        self._build()
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn('<a href="/blog/post.html">Post</a>', f.read())
+
+        # New body, same title: the home page is left alone.
+        self.write(post, "# Post\n\nOther words")
+        self.assertEqual(self._build()["reasons"], [(post, "source changed")])
+
+        self.write(post, "# Renamed\n\nOther words")
+        stats = self._build()
+        self.assertEqual(
+            stats["reasons"], [(index, f"title of {post} changed"), (post, "source changed")]
+        )
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn('<a href="/blog/post.html">Renamed</a>', f.read())
+
+    def test_changed_image_rebuilds_pages_showing_it(self):
+        cache = os.path.join(self.tmp.name, ".build", "images")
+        image = os.path.join(self.static, "pic.png")
+        with open(image, "wb") as f:
+            f.write(encode_png([bytearray(3 * 600)] * 2, 600, 2, 2))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![pic](/pic.png)")
+        self._build(image_cache_dir=cache)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn('width="600" height="2" srcset="/pic-480w.png 480w, /pic.png 600w"', f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "pic-480w.png")))
+
+        with open(image, "wb") as f:
+            f.write(encode_png([bytearray(3 * 300)] * 2, 300, 2, 2))
+        stats = self._build(image_cache_dir=cache)
+        self.assertEqual(stats["reasons"], [(os.path.join(self.content, "index.md"), "image /pic.png changed")])
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "pic-480w.png")))
+
+    def test_deleted_source_is_pruned(self):
+        self._build()
+        self.write(os.path.join(self.docs, "blog", "post.html.gz"), "")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        stats = self._build()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from inline_markdown import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_staged,
 )
 
 
@@ -153,6 +154,40 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
 
+
+class TestSinglePassTokenizer(unittest.TestCase):
+    SAMPLES = [
+        "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+        "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)",
+        "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and another ![second image](https://i.imgur.com/3elNhQu.png)",
+        "Test_test_test",
+        "**bold _not italic_ inside** and _italic `not code` inside_",
+        "a [link_with_underscores](https://example.com/a_b_c) then _it_",
+        "****empty bold**** and `` and __",
+        "![](not-an-image) ![alt](img.png)[text](url)",
+        "",
+    ]
+
+    def test_matches_staged_pipeline(self):
+        for text in self.SAMPLES:
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text), text_to_textnodes_staged(text))
+
+    def test_unbalanced_delimiters_raise_like_pipeline(self):
+        for text in ["**open", "_a **b** c_", "`a_b`", "**see [x](y)**"]:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    text_to_textnodes_staged(text)
+                with self.assertRaises(Exception):
+                    text_to_textnodes(text)
+
+    def test_link_heavy_paragraph(self):
+        text = " ".join(f"[l{i}](/p/{i}) **b{i}**" for i in range(2000))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 2000 * 4 - 1)
+        self.assertEqual(nodes[-1], TextNode("b1999", TextType.BOLD))
+
+
 if __name__ == "__main__":
     unittest.main()
 
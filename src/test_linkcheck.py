@@ -0,0 +1,72 @@
+import os
+import unittest
+
+from buildoptions import BuildOptions, set_build_options
+from depgraph import PageRefs
+from linkcheck import build_link_index, check_links, resolve_link
+from makesite import _generate_page
+from testsupport import TempDirTestCase
+
+
+class TestLinkIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.tmp.name
+        for rel_path in ("index.html", "contact.html", "blog/tom/index.html", "images/tom.png"):
+            self.write(rel_path, "x")
+        set_build_options(BuildOptions(link_check="warn"))
+
+    def tearDown(self):
+        set_build_options(BuildOptions())
+
+    def test_index_with_base_path(self):
+        index = build_link_index(self.docs, "/site/")
+        for url in (
+            "/site/",
+            "/site/index.html",
+            "/site/contact",
+            "/site/contact.html",
+            "/site/blog/tom",
+            "/site/blog/tom/",
+            "/site/images/tom.png",
+        ):
+            self.assertIn(url, index)
+        self.assertNotIn("/blog/tom/", index)
+
+    def test_resolve_link(self):
+        page = "/site/blog/tom/"
+        self.assertEqual(resolve_link("/contact#form", page, "/site/"), "/site/contact")
+        self.assertEqual(resolve_link("../../images/tom.png", page, "/site/"), "/site/images/tom.png")
+        self.assertEqual(resolve_link("/my%20file.png", page, "/site/"), "/site/my file.png")
+        self.assertEqual(resolve_link("/", page, None), "/")
+        for url in ("https://example.com/", "//example.com/x", "mailto:tom@example.com", "#top", "?q=1"):
+            self.assertIsNone(resolve_link(url, page, "/site/"))
+
+    def test_refs_collect_urls_outside_code_blocks(self):
+        refs = PageRefs(self.docs)
+        refs.fill("See [home](/), ![tom](/images/tom.png) and `code`")
+        refs.fill("```\n[also not](/code)\n```")
+        self.assertEqual(refs.urls, {"/": "link", "/images/tom.png": "image"})
+
+        set_build_options(BuildOptions())
+        refs = PageRefs(self.docs)
+        refs.fill("See [home](/)")
+        self.assertIsNone(refs.urls)
+
+    def test_check_generated_pages(self):
+        content = os.path.join(self.tmp.name, "content")
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        source = self.write(
+            os.path.join(content, "page.md"),
+            "# Page\n\n[tom](/blog/tom) [gone](/blog/gone/) [out](https://example.com)\n\n![tom](images/tom.png)",
+        )
+
+        metadata = _generate_page(source, template, os.path.join(self.docs, "page.html"), "/site/", content)
+        self.assertEqual(
+            check_links([metadata], self.docs, "/site/"),
+            [(source, "/blog/gone/", "link")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
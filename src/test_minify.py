@@ -0,0 +1,45 @@
+import io
+import unittest
+
+from minify import HtmlMinifier, minify_css, minify_html
+
+
+class TestMinify(unittest.TestCase):
+    def test_html_collapses_whitespace_outside_pre(self):
+        html = "<html>\n  <body>\n    <p>a\n  b</p><pre><code>x\n    y\n</code></pre>\n</body></html>\n"
+        self.assertEqual(
+            minify_html(html),
+            "<html> <body> <p>a b</p><pre><code>x\n    y\n</code></pre> </body></html>",
+        )
+
+    def test_streamed_html_matches_whole(self):
+        html = "\n <p>a \n</p> <pre>x\n  y</pre>\n<PRE>z  </pre >\t<script>if (a  <b) {}</script> <pretty>  q </pretty>\n"
+        for size in (1, 2, 3, 5, 8, len(html)):
+            with self.subTest(size=size):
+                out = io.StringIO()
+                minifier = HtmlMinifier(out)
+                for pos in range(0, len(html), size):
+                    minifier.write(html[pos : pos + size])
+                minifier.close()
+                self.assertEqual(out.getvalue(), minify_html(html))
+                self.assertEqual(minifier.original, len(html))
+
+    def test_unclosed_pre_is_held_until_the_end(self):
+        out = io.StringIO()
+        minifier = HtmlMinifier(out)
+        minifier.write("<p>a</p>  <pre>x\n")
+        self.assertEqual(out.getvalue(), "<p>a</p> ")
+        minifier.write("  y")
+        minifier.close()
+        self.assertEqual(out.getvalue(), minify_html("<p>a</p>  <pre>x\n  y"))
+
+    def test_css(self):
+        css = '/* theme */\nbody {\n  color: red;\n  font-family: "A  B", serif;\n}\n\ndiv :first-child > p { margin: 0 auto; }\n'
+        self.assertEqual(
+            minify_css(css),
+            'body{color:red;font-family:"A  B",serif}div :first-child>p{margin:0 auto}',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
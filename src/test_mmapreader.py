@@ -0,0 +1,56 @@
+import os
+import unittest
+from unittest import mock
+
+import makesite
+from blocks_markdown import markdown_to_blocks
+from buildoptions import BuildOptions, set_build_options
+from makesite import _extract_title
+from mmapreader import MappedMarkdown
+from testsupport import TempDirTestCase
+
+
+class TestMappedMarkdown(TempDirTestCase):
+    SAMPLES = [
+        "# Title\n\nPara one\nstill one\n\n\n- a\n- b\n",
+        "Intro\n\n  # Late Title  \n\n\n\nCafé ünïcode\n\n",
+        "no title\n\n",
+        "",
+    ]
+
+    def test_blocks_and_title_match_text_path(self):
+        for i, markdown in enumerate(self.SAMPLES):
+            with self.subTest(markdown=markdown):
+                with MappedMarkdown(self.write(f"{i}.md", markdown)) as source:
+                    self.assertEqual(list(source.blocks()), markdown_to_blocks(markdown))
+                    try:
+                        expected_title = _extract_title(markdown)
+                    except Exception:
+                        expected_title = None
+                    self.assertEqual(source.title(), expected_title)
+
+    def test_generate_page_with_mmap(self):
+        src = self.write("page.md", "# Heading\n\nSee [docs](/docs)\n\n1. one\n2. two\n")
+        template = self.write("template.html", '<title>{{ Title }}</title><link href="/a.css">{{ Content }}')
+        regular = os.path.join(self.tmp.name, "regular.html")
+        mapped = os.path.join(self.tmp.name, "mapped.html")
+        makesite._generate_page(src, template, regular, "/site/")
+        with mock.patch.object(makesite, "STREAMING_THRESHOLD", 0):
+            set_build_options(BuildOptions(use_mmap=True))
+            try:
+                makesite._generate_page(src, template, mapped, "/site/")
+            finally:
+                set_build_options(BuildOptions())
+        with open(regular) as f1, open(mapped) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_detects_carriage_returns(self):
+        path = os.path.join(self.tmp.name, "crlf.md")
+        with open(path, "wb") as f:
+            f.write(b"# T\r\n\r\nBody")
+        with MappedMarkdown(path) as source:
+            self.assertTrue(source.has_carriage_returns())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from buildoptions import BuildOptions, set_build_options
+from outputwriter import atomic_output, output_counters, reset_output_counters, write_output
+
+
+class TestWriteOutput(unittest.TestCase):
+    def setUp(self):
+        reset_output_counters()
+
+    def test_identical_content_is_not_rewritten(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            self.assertTrue(write_output(path, "<p>hello</p>"))
+            os.utime(path, ns=(0, 0))
+
+            self.assertFalse(write_output(path, "<p>hello</p>"))
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+
+            self.assertTrue(write_output(path, "<p>world</p>"))
+            with open(path) as f:
+                self.assertEqual(f.read(), "<p>world</p>")
+            self.assertEqual(output_counters(), {"written": 2, "unchanged": 1, "minify_in": 0, "minify_out": 0})
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+    def test_streamed_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            for _ in range(2):
+                with atomic_output(path) as f:
+                    f.write("<p>")
+                    f.write("hello</p>")
+            self.assertEqual(output_counters(), {"written": 1, "unchanged": 1, "minify_in": 0, "minify_out": 0})
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+    def test_minified_pages_compare_as_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            set_build_options(BuildOptions(minify=True))
+            try:
+                write_output(path, "<p>\n  hello\n</p>\n")
+                with atomic_output(path) as f:
+                    f.write("<p>\n  hello\n</p>\n")
+            finally:
+                set_build_options(BuildOptions())
+            with open(path) as f:
+                self.assertEqual(f.read(), "<p> hello </p>")
+            # Both writes count the bytes minifying saved.
+            self.assertEqual(output_counters(), {"written": 1, "unchanged": 1, "minify_in": 34, "minify_out": 28})
+
+    def test_failed_write_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.html")
+            write_output(path, "<p>old</p>")
+            with self.assertRaises(ValueError):
+                with atomic_output(path) as f:
+                    f.write("<p>half")
+                    raise ValueError("render failed")
+            with open(path) as f:
+                self.assertEqual(f.read(), "<p>old</p>")
+            self.assertEqual(os.listdir(tmp), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import unittest
+
+from parallel import BuildError, generate_pages_parallel
+from testsupport import TempDirTestCase
+
+
+class TestParallelBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        for i in range(6):
+            self.write(os.path.join(self.content, "blog", f"p{i}.md"), f"# Post {i}\n\nBody {i}")
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(len(generate_pages_parallel(self.content, self.template, self.docs, jobs=1)), 6)
+        serial = self.read_tree(self.docs)
+        generate_pages_parallel(self.content, self.template, self.docs, jobs=3)
+        self.assertEqual(self.read_tree(self.docs), serial)
+
+    def test_reports_every_failure(self):
+        self.write(os.path.join(self.content, "a.md"), "no title here")
+        self.write(os.path.join(self.content, "b.md"), "still no title")
+        with self.assertRaises(BuildError) as cm:
+            generate_pages_parallel(self.content, self.template, self.docs, jobs=2)
+        failed = [os.path.basename(src) for src, _ in cm.exception.failures]
+        self.assertEqual(failed, ["a.md", "b.md"])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "p5.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from postprocess import compress_outputs, compressible_outputs, remove_gzip_siblings
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def test_gzip_siblings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "index.html")
+            source = "<p> hello world </p>"
+            with open(page, "w") as f:
+                f.write(source)
+            stats = compress_outputs([page])
+            with gzip.open(page + ".gz", "rt") as f:
+                self.assertEqual(f.read(), source)
+            self.assertEqual(stats["files"], 1)
+            self.assertEqual(stats["original"], len(source))
+
+            # Already up to date: nothing to do the second time round.
+            self.assertEqual(compress_outputs([page])["files"], 0)
+
+            # Replacing the file with one carrying an older mtime (as copy2
+            # does for static assets) still triggers recompression.
+            with open(page, "w") as f:
+                f.write(source)
+            os.utime(page, ns=(0, 0))
+            self.assertEqual(compress_outputs([page])["files"], 1)
+
+    def test_plain_build_removes_generated_gzip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs, static = os.path.join(tmp, "docs"), os.path.join(tmp, "static")
+            for path in ("docs/index.html", "docs/app.js", "docs/app.js.gz", "static/app.js", "static/app.js.gz"):
+                os.makedirs(os.path.join(tmp, os.path.dirname(path)), exist_ok=True)
+                with open(os.path.join(tmp, path), "w") as f:
+                    f.write("x")
+            page = os.path.join(docs, "index.html")
+            compress_outputs([page])
+            # static/ ships app.js.gz itself, so only the page's .gz is ours.
+            outputs = compressible_outputs(docs, static)
+            self.assertEqual(outputs, [page])
+            self.assertEqual(remove_gzip_siblings(outputs), 1)
+            self.assertEqual(sorted(os.listdir(docs)), ["app.js", "app.js.gz", "index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
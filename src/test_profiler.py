@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+
+import makesite
+from buildoptions import BuildOptions, set_build_options
+from makesite import _generate_page
+from profiler import STAGES, disable_profiler, enable_profiler, format_report
+from testsupport import TempDirTestCase
+
+
+class TestProfiler(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        set_build_options(BuildOptions(quiet=True))
+
+    def tearDown(self):
+        set_build_options(BuildOptions())
+        disable_profiler()
+
+    def _page(self, name, markdown):
+        return self.write(name + ".md", markdown)
+
+    def test_profiled_output_matches_streamed_output(self):
+        src = self._page("a", "# A\n\n- one\n- **two**")
+        plain = os.path.join(self.tmp.name, "plain.html")
+        profiled = os.path.join(self.tmp.name, "profiled.html")
+        _generate_page(src, self.template, plain)
+        enable_profiler()
+        _generate_page(src, self.template, profiled)
+        with open(plain) as f1, open(profiled) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_large_pages_are_streamed_and_timed_as_a_whole(self):
+        src = self._page("big", "# Big\n\n" + "Some _text_ here\n\n" * 50)
+        plain = os.path.join(self.tmp.name, "plain.html")
+        _generate_page(src, self.template, plain)
+        profiler = enable_profiler()
+        threshold = makesite.STREAMING_THRESHOLD
+        makesite.STREAMING_THRESHOLD = 100
+        try:
+            _generate_page(src, self.template, os.path.join(self.tmp.name, "profiled.html"))
+        finally:
+            makesite.STREAMING_THRESHOLD = threshold
+        report = profiler.report()
+        self.assertGreater(report["stages"]["stream"], 0)
+        self.assertEqual(report["stages"]["inline"], 0)
+        self.assertIn("(stream:", format_report(report))
+        with open(plain) as f1, open(os.path.join(self.tmp.name, "profiled.html")) as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_report_covers_stages_and_slowest_pages(self):
+        profiler = enable_profiler()
+        for i in range(3):
+            src = self._page(f"p{i}", f"# Page {i}\n\n" + "Some _text_ here\n\n" * (i + 1))
+            _generate_page(src, self.template, os.path.join(self.tmp.name, f"p{i}.html"))
+        report = profiler.report(top=2)
+        self.assertEqual(report["pages"], 3)
+        self.assertEqual(len(report["slowest"]), 2)
+        for name in STAGES:
+            self.assertIn(name, report["stages"])
+        self.assertGreater(report["stages"]["inline"], 0)
+        self.assertEqual(json.loads(format_report(report, "json"))["pages"], 3)
+        self.assertIn("pages/sec", format_report(report))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from blocks_markdown import markdown_to_html_node
+from render_cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    MARKDOWN = "# Title\n\nShared **disclaimer** with [a link](/about)\n\n- one\n- two"
+
+    def test_cached_output_matches_uncached(self):
+        cache = RenderCache()
+        expected = markdown_to_html_node(self.MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(self.MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(self.MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.counters(), {"hits": 3, "disk_hits": 0, "misses": 3})
+
+    def test_base_path_is_part_of_the_key(self):
+        cache = RenderCache()
+        self.assertIn('href="/about"', cache.render("[a link](/about)"))
+        self.assertIn('href="/site/about"', cache.render("[a link](/about)", "/site/"))
+        self.assertEqual(cache.misses, 2)
+
+    def test_lru_eviction(self):
+        cache = RenderCache(maxsize=2)
+        for block in ("a", "b", "a", "c", "b"):
+            cache.render(block)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 4)
+
+    def test_disk_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            first = RenderCache(path=path)
+            html = first.render("Some _shared_ block")
+            second = RenderCache(path=path)
+            self.assertEqual(second.render("Some _shared_ block"), html)
+            self.assertEqual(second.counters(), {"hits": 0, "disk_hits": 1, "misses": 0})
+
+    def test_prune_drops_least_recently_used_fragments(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            cache = RenderCache(path=path)
+            old = cache.render("Old block")
+            recent = cache.render("Recent block")
+            cache._connect().execute("UPDATE fragments SET used = 0 WHERE html = ?", (old,))
+            self.assertEqual(cache.prune(), 0)
+
+            cache.max_disk_bytes = len(recent.encode("utf-8"))
+            self.assertEqual(cache.prune(), 1)
+            fresh = RenderCache(path=path)
+            fresh.render("Recent block")
+            fresh.render("Old block")
+            self.assertEqual(fresh.counters(), {"hits": 0, "disk_hits": 1, "misses": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import makesite
+from buildoptions import BuildOptions, set_build_options
+from searchindex import (
+    _load_page_terms,
+    build_search_index,
+    page_postings,
+    record_page_terms,
+    search_index_outputs,
+    shard_name,
+)
+from testsupport import TempDirTestCase
+
+
+class TestPagePostings(unittest.TestCase):
+    def test_visible_words_only(self):
+        markdown = "# The **Hobbit**\n\n- See [the map](/maps/wilds)\n- ![Smaug](/smaug.png)\n\n```\nthe code\n```"
+        self.assertEqual(
+            page_postings(markdown),
+            {"the": [0, 3, 6], "hobbit": [1], "see": [2], "map": [4], "smaug": [5], "code": [7]},
+        )
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("a"), "a")
+        self.assertEqual(shard_name("éowyn"), "_c3a96f")
+
+
+class TestBuildSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.pages = []
+        texts = {
+            "index": "# Home\n\nHobbits live in holes",
+            "blog/tom": "# Tom\n\nTom lives by the river, hobbits visit Tom",
+            "contact": "# Contact\n\nWrite to the hobbits",
+        }
+        for name, text in texts.items():
+            source = self.write(name.replace("/", "-") + ".md", text)
+            dest = os.path.join(self.docs, name if name != "index" else "", "index.html")
+            self.pages.append({"source": source, "dest": dest, "title": text[2:].split("\n")[0], "summary": ""})
+
+    def _load(self, name):
+        with open(os.path.join(self.docs, "search", name)) as f:
+            return json.load(f)
+
+    def test_index_layout(self):
+        build_search_index(self.pages, self.docs, "/site/")
+        meta = self._load("pages.json")
+        self.assertEqual([page[0] for page in meta["pages"]], ["/site/", "/site/blog/tom/", "/site/contact/"])
+        self.assertIn("ho", meta["shards"])
+        # Page 1 is /blog/tom/: "tom" at 0, 1 and 8, stored as gaps.
+        self.assertEqual(self._load("to.json")["tom"], [[1, 0, 1, 7]])
+        self.assertEqual(self._load("ho.json")["hobbits"], [[0, 1], [1, 6], [2, 4]])
+
+    def test_merging_runs_gives_the_same_index(self):
+        build_search_index(self.pages, self.docs)
+        expected = {name: self._load(name) for name in os.listdir(os.path.join(self.docs, "search"))}
+        stats = build_search_index(self.pages, self.docs, run_size=2)
+        self.assertGreater(stats["runs"], 1)
+        actual = {name: self._load(name) for name in os.listdir(os.path.join(self.docs, "search"))}
+        self.assertEqual(actual, expected)
+
+    def test_outputs_are_listed_for_the_next_build(self):
+        self.assertEqual(search_index_outputs(self.docs), [])
+        build_search_index(self.pages, self.docs)
+        out_dir = os.path.join(self.docs, "search")
+        self.assertEqual(
+            sorted(search_index_outputs(self.docs)),
+            sorted(os.path.join(out_dir, name) for name in os.listdir(out_dir)),
+        )
+
+    def test_unused_shards_are_removed(self):
+        build_search_index(self.pages, self.docs)
+        # A file that came from static/search/, not from the index.
+        self.write(os.path.join(self.docs, "search", "synonyms.json"), "{}")
+        build_search_index(self.pages[:1], self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "search", "to.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "search", "ho.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "search", "synonyms.json")))
+
+    def test_recorded_terms_are_used_instead_of_the_sources(self):
+        build_search_index(self.pages, self.docs)
+        expected = self._load("to.json")
+        store = os.path.join(self.tmp.name, "terms")
+        set_build_options(BuildOptions(search_terms_path=store))
+        try:
+            for page in self.pages:
+                with open(page["source"]) as f:
+                    record_page_terms(page, f.read())
+                os.remove(page["source"])
+            build_search_index(self.pages, self.docs)
+            self.assertEqual(self._load("to.json"), expected)
+
+            # Terms no page refers to any more are pruned.
+            build_search_index(self.pages[:1], self.docs)
+            stored = [name for _, _, names in os.walk(store) for name in names]
+            self.assertEqual(stored, [self.pages[0]["search"] + ".json"])
+        finally:
+            set_build_options(BuildOptions())
+
+    def test_streamed_pages_record_their_terms(self):
+        markdown = "# Big\n\nSee [](/contact/) and *the* hobbits\n\n```\ncode here\n```\n"
+        source = self.write(os.path.join("content", "big.md"), markdown)
+        self.write(os.path.join("content", "contact.md"), "# Contact\n\nHi")
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        set_build_options(BuildOptions(quiet=True, search_terms_path=os.path.join(self.tmp.name, "terms")))
+        try:
+            with mock.patch.object(makesite, "STREAMING_THRESHOLD", 0):
+                page = makesite._generate_page(
+                    source, template, os.path.join(self.docs, "big", "index.html"), "/", os.path.join(self.tmp.name, "content")
+                )
+            self.assertIn("search", page)
+            os.remove(source)
+            self.assertEqual(_load_page_terms(page), page_postings(markdown))
+        finally:
+            set_build_options(BuildOptions())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import unittest
+
+from parallel import generate_pages_parallel
+from sharding import ShardError, build_shard, merge_shards, parse_shard, shard_of, shard_path
+from testsupport import TempDirTestCase
+
+
+class TestShardAssignment(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "x/2", "1"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable_and_covers_every_shard(self):
+        paths = [f"blog/post-{i}/index.md" for i in range(200)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in reversed(paths)][::-1])
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual(shard_of(os.path.join("blog", "a.md"), 3), shard_of("blog/a.md", 3))
+
+
+class TestShardedBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.shards = os.path.join(root, "shards")
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        for i in range(12):
+            self.write(
+                os.path.join(self.content, "blog", f"post-{i}", "index.md"),
+                f"# Post {i}\n\nSee [](/blog/post-{(i + 1) % 12}/)",
+            )
+
+    def _build_shards(self, count, base_path="/site/"):
+        for index in range(1, count + 1):
+            build_shard(self.content, self.template, self.shards, base_path, index, count)
+
+    def test_merge_matches_single_build(self):
+        single = os.path.join(self.tmp.name, "single")
+        merged = os.path.join(self.tmp.name, "merged")
+        generate_pages_parallel(self.content, self.template, single, "/site/", jobs=1)
+        self._build_shards(3)
+        pages, removed = merge_shards(self.shards, 3, self.static, merged, "/site/")
+
+        self.assertEqual(len(pages), 12)
+        self.assertEqual(removed, 0)
+        expected = self.read_tree(single)
+        expected["index.css"] = "body {}"
+        self.assertEqual(self.read_tree(merged), expected)
+        self.assertEqual(
+            sorted(page["dest"] for page in pages),
+            sorted(os.path.join(merged, "blog", f"post-{i}", "index.html") for i in range(12)),
+        )
+
+    def test_missing_shard(self):
+        build_shard(self.content, self.template, self.shards, "/", 1, 2)
+        with self.assertRaisesRegex(ShardError, "2/2"):
+            merge_shards(self.shards, 2, self.static, os.path.join(self.tmp.name, "docs"))
+
+    def test_collisions_are_reported(self):
+        self._build_shards(2)
+        first = os.path.join(shard_path(self.shards, 1, 2), "manifest.json")
+        second = os.path.join(shard_path(self.shards, 2, 2), "manifest.json")
+        with open(first) as f:
+            manifest = json.load(f)
+        with open(second) as f:
+            other = json.load(f)
+        # Pretend shard 2 also rendered one of shard 1's pages.
+        src_path, entry = next(iter(manifest["pages"].items()))
+        other["pages"][src_path] = entry
+        with open(second, "w") as f:
+            json.dump(other, f)
+        with self.assertRaisesRegex(ShardError, "collide"):
+            merge_shards(self.shards, 2, self.static, os.path.join(self.tmp.name, "docs"))
+
+    def test_shards_from_different_trees_are_rejected(self):
+        build_shard(self.content, self.template, self.shards, "/", 1, 2)
+        self.write(os.path.join(self.content, "extra.md"), "# Extra")
+        build_shard(self.content, self.template, self.shards, "/", 2, 2)
+        with self.assertRaisesRegex(ShardError, "content trees"):
+            merge_shards(self.shards, 2, self.static, os.path.join(self.tmp.name, "docs"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+from siteindex import SummaryCollector, build_site_index, page_url, site_index_outputs
+from template import CompiledTemplate
+from testsupport import TempDirTestCase
+
+
+class TestSummaryCollector(unittest.TestCase):
+    def test_first_prose_paragraph(self):
+        collector = SummaryCollector()
+        blocks = ["# Title", "[< Back Home](/)", "![img](/a.png)", "Some **bold**\nprose", "Later"]
+        self.assertEqual(list(collector.watch(blocks)), blocks)
+        self.assertEqual(collector.text, "Some bold prose")
+
+
+class TestPageUrl(unittest.TestCase):
+    def test_urls(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+
+class TestBuildSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.pages = [
+            {
+                "source": f"content/blog/p{i}/index.md",
+                "dest": os.path.join(self.docs, "blog", f"p{i}", "index.html"),
+                "title": f"Post {i}",
+                "summary": f"Summary <{i}>",
+                "mtime": 1_700_000_000 + i,
+            }
+            for i in range(5)
+        ]
+        self.pages.append(
+            {
+                "source": "content/index.md",
+                "dest": os.path.join(self.docs, "index.html"),
+                "title": "Home",
+                "summary": "",
+                "mtime": 1_700_000_000,
+            }
+        )
+        self.template = CompiledTemplate("<title>{{ Title }}</title>{{ Content }}", "/site/")
+
+    def _read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def test_paginated_listings_newest_first(self):
+        written = build_site_index(self.pages, self.docs, self.template, None, "/site/", page_size=2)
+        self.assertEqual(len(written), 3)
+        first = self._read("blog", "index.html")
+        self.assertLess(first.index("Post 4"), first.index("Post 3"))
+        self.assertIn('href="/site/blog/page/2/"', first)
+        self.assertIn("Summary &lt;4&gt;", first)
+        self.assertIn("Post 0", self._read("blog", "page", "3", "index.html"))
+
+    def test_sitemap_and_feed(self):
+        build_site_index(self.pages, self.docs, self.template, "https://example.com", "/site/")
+        sitemap = ET.fromstring(self._read("sitemap.xml"))
+        locs = [el.text for el in sitemap.iter("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")]
+        self.assertIn("https://example.com/site/", locs)
+        self.assertIn("https://example.com/site/blog/p3/", locs)
+        feed = ET.fromstring(self._read("feed.xml"))
+        titles = [el.text for el in feed.iter("title")]
+        self.assertEqual(titles[1:3], ["Post 4", "Post 3"])
+        self.assertNotIn("Home", titles)
+
+    def test_titles_are_escaped(self):
+        self.pages[4]["title"] = "Fish & <Chips>"
+        build_site_index(self.pages, self.docs, self.template, "https://example.com")
+        self.assertIn(">Fish &amp; &lt;Chips&gt;</a>", self._read("blog", "index.html"))
+        titles = [el.text for el in ET.fromstring(self._read("feed.xml")).iter("title")]
+        self.assertIn("Fish & <Chips>", titles)
+
+    def test_outputs_are_known_before_rendering(self):
+        dests = [page["dest"] for page in self.pages]
+        for site_url, page_size in ((None, 2), ("https://example.com", 10)):
+            written = build_site_index(self.pages, self.docs, self.template, site_url, "/site/", page_size)
+            self.assertEqual(site_index_outputs(dests, self.docs, site_url, page_size), written)
+
+    def test_does_not_overwrite_content_page(self):
+        self.pages.append(
+            {
+                "source": "content/blog/index.md",
+                "dest": os.path.join(self.docs, "blog", "index.html"),
+                "title": "Blog home",
+                "summary": "",
+                "mtime": 0,
+            }
+        )
+        written = build_site_index(self.pages, self.docs, self.template, None)
+        self.assertEqual(written, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
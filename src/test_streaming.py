@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import makesite
+from blocks_markdown import markdown_to_blocks
+from render_cache import RenderCache
+from streaming import BlockReader, stream_page
+from template import CompiledTemplate
+
+
+class TestBlockReader(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        samples = [
+            "# Title\n\nPara one\nstill one\n\n\n- a\n- b\n",
+            "\n\n  leading\n\n \n\ntrailing",
+            "no title\n\n\n\n",
+            "",
+        ]
+        for markdown in samples:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(list(BlockReader(io.StringIO(markdown))), markdown_to_blocks(markdown))
+
+    def test_title_found_in_same_pass(self):
+        reader = BlockReader(io.StringIO("Intro\n\n  # The Title  \n\nBody"))
+        blocks = iter(reader)
+        self.assertEqual(next(blocks), "Intro")
+        self.assertIsNone(reader.title)
+        next(blocks)
+        self.assertEqual(reader.title, "The Title")
+
+
+class TestStreamPage(unittest.TestCase):
+    MARKDOWN = "Preamble with [a link](/x)\n\n# Heading\n\n1. one\n2. two\n\n![img](/i.png)\n"
+    TEMPLATE = '<title>{{ Title }}</title><link href="/a.css">{{ Content }}'
+
+    def test_output_matches_generate_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "page.md")
+            template_path = os.path.join(tmp, "template.html")
+            with open(src, "w") as f:
+                f.write(self.MARKDOWN)
+            with open(template_path, "w") as f:
+                f.write(self.TEMPLATE)
+
+            regular = os.path.join(tmp, "regular.html")
+            streamed = os.path.join(tmp, "streamed.html")
+            makesite._generate_page(src, template_path, regular, "/site/")
+            with mock.patch.object(makesite, "STREAMING_THRESHOLD", 0):
+                makesite._generate_page(src, template_path, streamed, "/site/")
+
+            with open(regular) as f1, open(streamed) as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_with_render_cache(self):
+        template = CompiledTemplate(self.TEMPLATE)
+        plain, cached = io.StringIO(), io.StringIO()
+        stream_page(io.StringIO(self.MARKDOWN), template, plain)
+        stream_page(io.StringIO(self.MARKDOWN), template, cached, RenderCache())
+        self.assertEqual(plain.getvalue(), cached.getvalue())
+
+    def test_missing_title(self):
+        with self.assertRaises(Exception):
+            stream_page(io.StringIO("just text"), CompiledTemplate(self.TEMPLATE), io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from template import CompiledTemplate, load_template
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_render(self):
+        template = CompiledTemplate("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><main><p>x</p></main>",
+        )
+
+    def test_base_path_only_touches_literals(self):
+        template = CompiledTemplate('<link href="/a.css" /><img src="/b.png">{{ Content }}', "/site/")
+        page = template.render(Content='<a href="/untouched">')
+        self.assertEqual(
+            page, '<link href="/site/a.css" /><img src="/site/b.png"><a href="/untouched">'
+        )
+
+    def test_repeated_placeholder(self):
+        template = CompiledTemplate("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render(Title="T"), "T - T")
+
+    def test_load_template_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            self.assertIs(load_template(path, "/"), load_template(path, "/"))
+            self.assertIsNot(load_template(path, "/"), load_template(path, "/other/"))
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "partials"))
+            path = os.path.join(tmp, "template.html")
+            nav = os.path.join(tmp, "partials", "nav.html")
+            link = os.path.join(tmp, "partials", "link.html")
+            with open(path, "w") as f:
+                f.write("{{> partials/nav.html }}<main>{{ Content }}</main>")
+            with open(nav, "w") as f:
+                f.write("<nav>{{> link.html }}</nav>\n")
+            with open(link, "w") as f:
+                f.write('<a href="/">Home</a>\n')
+
+            template = load_template(path, "/site/")
+            self.assertEqual(template.dependencies, [path, nav, link])
+            self.assertEqual(template.render(Content="x"), '<nav><a href="/site/">Home</a></nav><main>x</main>')
+
+            with open(link, "w") as f:
+                f.write('<a href="/about">About</a>')
+            os.utime(link, ns=(0, 0))
+            self.assertIn("About", load_template(path, "/site/").render(Content="x"))
+
+    def test_recursive_partial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{> template.html }}")
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
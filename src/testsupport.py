@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    # Each test gets a fresh temporary directory in self.tmp, removed after
+    # the test and any tearDown have run.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, path, text):
+        # Relative paths are taken from the temporary directory and missing
+        # parent directories are created. Returns the file's path.
+        path = os.path.join(self.tmp.name, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def read_tree(self, root):
+        # {path relative to root: text} for every file under root.
+        tree = {}
+        for dir_path, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(dir_path, name)
+                with open(path, encoding="utf-8") as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
@@ -1,4 +1,5 @@
 from htmlnode import LeafNode
+from images import image_attributes
 from enum import Enum
 
 class TextType(Enum):
@@ -10,6 +11,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type: TextType, url = None):
         self.text = text
         self.text_type = text_type
@@ -34,6 +37,8 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.LINK:
         return LeafNode("a", text_node.text, {"href": text_node.url})
     if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        props = {"src": text_node.url, "alt": text_node.text}
+        props.update(image_attributes(text_node.url))
+        return LeafNode("img", "", props)
     raise ValueError(f"invalid text type: {text_node.text_type}")
 